@@ -0,0 +1,141 @@
+"""MIT License.
+
+Copyright (c) 2020-2021 Faholan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+Compare the argument handling of custom commands, before and after.
+
+Member arguments are converted by a stand-in for MemberConverter that waits
+for `--latency` milliseconds, like a fetch of an uncached member through the
+API would. Usage : python -m benchmarks.custom_arguments
+"""
+
+import argparse
+import asyncio
+import statistics
+import typing as t
+from time import perf_counter
+
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+
+
+class SlowMemberConverter(commands.Converter):
+    """Stand-in for MemberConverter, for members that aren't cached."""
+
+    latency = 0.1
+
+    async def convert(self, ctx: t.Any, argument: str) -> int:
+        """Wait for the fake API, then return the id."""
+        await asyncio.sleep(self.latency)
+        return int(argument.strip("<@!>"))
+
+
+TYPES = {"member": SlowMemberConverter, "int": int, "str": str}
+
+
+async def previous_path(content: str, full_args: t.List[t.Tuple[str, str]],
+                        prefix: str) -> t.Dict[str, t.Any]:
+    """Split on spaces and convert each argument in turn."""
+    del prefix  # The previous parser assumed a prefix without spaces
+    args = content.split(" ")[1:]
+    kwargs = {}
+    for arg, (name, raw_type) in zip(args, full_args):
+        converter = TYPES.get(raw_type, str)
+        if converter in {str, int}:
+            kwargs[name] = converter(arg)
+        else:
+            kwargs[name] = await converter().convert(None, arg)
+    return kwargs
+
+
+async def current_path(content: str, full_args: t.List[t.Tuple[str, str]],
+                       prefix: str) -> t.Dict[str, t.Any]:
+    """Parse quoted words and convert the arguments concurrently."""
+    view = StringView(content)
+    view.skip_string(prefix)
+    view.get_word()
+    args = []
+    for _ in full_args:
+        view.skip_ws()
+        args.append(view.get_quoted_word())
+
+    async def convert(arg: str, raw_type: str) -> t.Any:
+        """Convert a single argument."""
+        converter = TYPES.get(raw_type, str)
+        if converter in {str, int}:
+            return converter(arg)
+        return await converter().convert(None, arg)
+
+    results = await asyncio.gather(
+        *(convert(arg, raw_type)
+          for arg, (_, raw_type) in zip(args, full_args)))
+    return {name: result for (name, _), result in zip(full_args, results)}
+
+
+def report(label: str, timings: t.List[float]) -> None:
+    """Print the p50 and p99 of some timings, in milliseconds."""
+    centiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{label:<36} p50 {centiles[49] * 1000:8.3f} ms   "
+        f"p99 {centiles[98] * 1000:8.3f} ms"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the custom command argument handling.")
+    parser.add_argument("--latency", type=float, default=100,
+                        help="fake API latency, in milliseconds")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    SlowMemberConverter.latency = args.latency / 1000
+
+    for members in (1, 3, 6):
+        full_args = [(f"member{i}", "member") for i in range(members)]
+        full_args += [("count", "int"), ("text", "str")]
+        content = "!hug " + " ".join(
+            f"<@{100000 + i}>" for i in range(members)) + " 3 hello"
+        for label, path in (("previous", previous_path),
+                            ("current", current_path)):
+            timings = []
+            for _ in range(args.runs):
+                start = perf_counter()
+                await path(content, full_args, "!")
+                timings.append(perf_counter() - start)
+            report(f"{members} Member arguments, {label}", timings)
+
+    view_timings = []
+    for _ in range(args.runs * 50):
+        start = perf_counter()
+        view = StringView('!hug "quoted words" <@1> 3 hello')
+        view.skip_string("!")
+        view.get_word()
+        while not view.eof:
+            view.skip_ws()
+            view.get_quoted_word()
+        view_timings.append(perf_counter() - start)
+    report("StringView parsing alone", view_timings)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,210 @@
+"""MIT License.
+
+Copyright (c) 2020-2021 Faholan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Compare the latency of the tag retrieval paths on a seeded PostgreSQL.
+
+The tables are temporary copies of the tag tables, so no real data is
+touched. Usage : python -m benchmarks.tag_retrieval [--dsn DSN]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import typing as t
+from collections import Counter
+from time import perf_counter
+
+import asyncpg
+
+SCHEMA = """
+CREATE TEMPORARY TABLE tag_contents (
+    hash bytea PRIMARY KEY,
+    content text NOT NULL
+);
+CREATE TEMPORARY TABLE tags (
+    id integer PRIMARY KEY,
+    location_id bigint NOT NULL,
+    owner_id bigint NOT NULL,
+    name text NOT NULL,
+    content_hash bytea NOT NULL REFERENCES tag_contents (hash),
+    use_count integer NOT NULL DEFAULT 0,
+    UNIQUE (location_id, name)
+);
+CREATE TEMPORARY TABLE tag_lookup (
+    name text NOT NULL,
+    location_id bigint NOT NULL,
+    owner_id bigint NOT NULL,
+    tag_id integer NOT NULL,
+    use_count integer NOT NULL DEFAULT 0,
+    UNIQUE (name, location_id)
+);
+"""
+
+
+async def seed(database: asyncpg.Connection, tags: int,
+               locations: int) -> t.List[t.Tuple[str, int]]:
+    """Create the tables and fill them, returning the existing keys."""
+    await database.execute(SCHEMA)
+    contents = {}
+    tag_rows = []
+    lookup_rows = []
+    for tag_id in range(1, tags + 1):
+        content = f"Content of the tag number {tag_id % (tags // 2 or 1)}"
+        content_hash = hashlib.sha256(content.encode()).digest()
+        contents[content_hash] = content
+        location_id = tag_id % locations
+        name = f"tag{tag_id}"
+        tag_rows.append((tag_id, location_id, 0, name, content_hash))
+        lookup_rows.append((name, location_id, 0, tag_id))
+    await database.copy_records_to_table(
+        "tag_contents", records=list(contents.items()))
+    await database.copy_records_to_table(
+        "tags",
+        records=tag_rows,
+        columns=("id", "location_id", "owner_id", "name", "content_hash"),
+    )
+    await database.copy_records_to_table(
+        "tag_lookup",
+        records=lookup_rows,
+        columns=("name", "location_id", "owner_id", "tag_id"),
+    )
+    await database.execute("ANALYZE tag_contents, tags, tag_lookup")
+    return [(row[0], row[1]) for row in lookup_rows]
+
+
+async def previous_path(database: asyncpg.Connection, name: str,
+                        location_id: int) -> str:
+    """Retrieve a tag with the four statements used before."""
+    row = await database.fetchrow(
+        "SELECT * FROM tag_lookup WHERE name=$1 AND location_id=$2",
+        name,
+        location_id,
+    )
+    tag = await database.fetchrow(
+        "SELECT tags.*, content FROM tags JOIN tag_contents ON "
+        "hash=content_hash WHERE id=$1",
+        row["tag_id"],
+    )
+    await database.execute(
+        "UPDATE tags SET use_count=use_count+1 WHERE id=$1",
+        tag["id"],
+    )
+    await database.execute(
+        "UPDATE tag_lookup SET use_count=use_count+1 WHERE name=$1 AND "
+        "location_id=$2",
+        name,
+        location_id,
+    )
+    return tag["content"]
+
+
+async def current_path(database: asyncpg.Connection, name: str,
+                       location_id: int) -> t.Tuple[int, str]:
+    """Retrieve a tag with the single statement of Tags.tag."""
+    row = await database.fetchrow(
+        "SELECT tag_id, content FROM tag_lookup LEFT JOIN tags ON "
+        "tags.id=tag_lookup.tag_id LEFT JOIN tag_contents ON "
+        "hash=content_hash WHERE tag_lookup.name=$1 AND "
+        "tag_lookup.location_id=$2",
+        name,
+        location_id,
+    )
+    return row["tag_id"], row["content"]
+
+
+async def flush(database: asyncpg.Connection, tag_uses: Counter,
+                alias_uses: Counter) -> None:
+    """Write the use counts the way Tags.flush_uses does."""
+    await database.execute(
+        "WITH tag AS (UPDATE tags SET use_count=use_count+uses.count FROM "
+        "UNNEST($1::integer[], $2::integer[]) AS uses(id, count) WHERE "
+        "tags.id=uses.id) UPDATE tag_lookup SET use_count=use_count+"
+        "uses.count FROM UNNEST($3::text[], $4::bigint[], $5::integer[]) AS "
+        "uses(name, location_id, count) WHERE tag_lookup.name=uses.name AND "
+        "tag_lookup.location_id=uses.location_id",
+        list(tag_uses),
+        list(tag_uses.values()),
+        [name for name, _ in alias_uses],
+        [location_id for _, location_id in alias_uses],
+        list(alias_uses.values()),
+    )
+
+
+def report(label: str, timings: t.List[float]) -> None:
+    """Print the p50 and p99 of some timings, in milliseconds."""
+    centiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{label:<32} p50 {centiles[49] * 1000:7.3f} ms   "
+        f"p99 {centiles[98] * 1000:7.3f} ms"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tag retrieval paths.")
+    parser.add_argument("--dsn", default="postgresql://localhost/postgres")
+    parser.add_argument("--tags", type=int, default=100000)
+    parser.add_argument("--locations", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    database = await asyncpg.connect(args.dsn)
+    try:
+        keys = await seed(database, args.tags, args.locations)
+        lookups = random.choices(keys, k=args.lookups)
+
+        previous = []
+        for name, location_id in lookups:
+            start = perf_counter()
+            await previous_path(database, name, location_id)
+            previous.append(perf_counter() - start)
+
+        current = []
+        tag_uses: Counter = Counter()
+        alias_uses: Counter = Counter()
+        for name, location_id in lookups:
+            start = perf_counter()
+            tag_id, _ = await current_path(database, name, location_id)
+            tag_uses[tag_id] += 1
+            alias_uses[(name, location_id)] += 1
+            current.append(perf_counter() - start)
+        start = perf_counter()
+        await flush(database, tag_uses, alias_uses)
+        flush_time = perf_counter() - start
+
+        report("Previous path (4 statements)", previous)
+        report("Current path (cache miss)", current)
+        print(
+            f"Use count flush for {args.lookups} lookups : "
+            f"{flush_time * 1000:.3f} ms "
+            f"({flush_time * 1000 / args.lookups:.4f} ms per lookup)"
+        )
+        print("Cache hits don't query the database at all.")
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""MIT License.
+
+Copyright (c) 2020-2021 Faholan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import typing as t
+
+from discord.ext import commands
+
+
+def persistent_cooldown(
+    per: float,
+    bucket: commands.BucketType = commands.BucketType.default,
+) -> t.Callable[[t.Any], t.Any]:
+    """Check adding a cooldown that survives restarts, for long cooldowns.
+
+    Put it below the other checks : they run from top to bottom, and this one
+    starts the cooldown when it passes.
+    """
+    cooldown = commands.Cooldown(1, per, bucket)
+
+    async def predicate(ctx: commands.Context) -> bool:
+        """Start the cooldown."""
+        await ctx.bot.use_cooldown(ctx, cooldown)
+        return True
+
+    return commands.check(predicate)
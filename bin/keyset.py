@@ -0,0 +1,127 @@
+"""MIT License.
+
+Copyright (c) 2020-2021 Faholan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import typing as t
+
+import asyncpg
+import discord
+from discord.ext import commands, menus
+
+
+class KeysetSource(menus.PageSource):
+    """Source fetching each page with a single keyset-paginated query.
+
+    The query receives `args`, then the key of the previous page's last row,
+    then the number of rows to fetch.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.pool.Pool,
+        query: str,
+        args: t.Sequence[t.Any],
+        first_key: t.Sequence[t.Any],
+        key: t.Callable[[asyncpg.Record], t.Sequence[t.Any]],
+        title: str,
+        formatter: t.Callable[[int, asyncpg.Record], str],
+        per_page: int = 15,
+    ) -> None:
+        """Initialize KeysetSource."""
+        self.pool = pool
+        self.query = query
+        self.args = args
+        self.key = key
+        self.title = title
+        self.formatter = formatter
+        self.per_page = per_page
+        self._pages: t.List[t.List[asyncpg.Record]] = []
+        self._keys = [first_key]
+        self._done = False
+
+    async def prepare(self) -> None:
+        """Fetch the first page."""
+        await self.get_page(0)
+
+    def is_paginating(self) -> bool:
+        """Check whether there is more than one page."""
+        return not self._done or len(self._pages) > 1
+
+    def get_max_pages(self) -> None:
+        """Return None, as the number of pages isn't known in advance."""
+        return None
+
+    async def get_page(self, page_number: int) -> t.List[asyncpg.Record]:
+        """Get a page, fetching it if we haven't yet."""
+        if page_number < 0:
+            raise IndexError(page_number)
+        while len(self._pages) <= page_number:
+            if self._done:
+                raise IndexError(page_number)
+            async with self.pool.acquire() as database:
+                rows = await database.fetch(
+                    self.query,
+                    *self.args,
+                    *self._keys[-1],
+                    self.per_page + 1,
+                )
+            self._done = len(rows) <= self.per_page
+            rows = rows[:self.per_page]
+            if not rows and self._pages:
+                raise IndexError(page_number)
+            self._pages.append(rows)
+            if rows:
+                self._keys.append(self.key(rows[-1]))
+        return self._pages[page_number]
+
+    async def format_page(
+        self,
+        menu: menus.Menu,
+        page: t.List[asyncpg.Record],
+    ) -> discord.Embed:
+        """Create the embed."""
+        start = menu.current_page * self.per_page
+        embed = discord.Embed(
+            title=self.title,
+            colour=discord.Colour.blue(),
+            description="\n".join(
+                self.formatter(start + i + 1, row)
+                for i, row in enumerate(page)),
+        )
+        embed.set_footer(text=f"Page {menu.current_page + 1}")
+        return embed
+
+
+async def send_keyset_pages(
+    ctx: commands.Context,
+    source: KeysetSource,
+    empty: str,
+) -> None:
+    """Send the pages, or the `empty` message if there are none."""
+    await source.prepare()
+    if not source.is_paginating() and not await source.get_page(0):
+        await ctx.send(empty)
+        return
+    await menus.MenuPages(
+        source=source,
+        clear_reactions_after=True,
+    ).start(ctx)
@@ -21,9 +21,12 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import traceback
 import typing as t
-from asyncio import all_tasks
+from asyncio import Semaphore, all_tasks, gather
 from datetime import datetime
+from heapq import nlargest
+from time import monotonic, time
 
 import aiohttp
 import asyncpg
@@ -86,6 +89,15 @@ class ChaoticBot(commands.Bot):
 
         self.prefix_dict: t.Dict[int, str] = {}
 
+        self.member_cache: t.Dict[t.Tuple[int, int], t.Tuple[
+            float, t.Optional[discord.Member]]] = {}
+        self.member_ttl = 300
+        self.member_semaphore = Semaphore(5)
+        # Members fetched through the API, as the members intent is disabled
+
+        self.cooldown_cache: t.Dict[t.Tuple[str, str], float] = {}
+        # Expiry timestamps of the persistent cooldowns
+
         super().__init__(
             command_prefix=self.get_m_prefix,
             intents=self.used_intents,
@@ -172,7 +184,18 @@ class ChaoticBot(commands.Bot):
         await self.log_channel.send(f"{guild.name} left")
 
     async def close(self) -> None:
-        """Do some cleanup."""
+        """Do some cleanup.
+
+        Cogs defining a `flush` coroutine get to write their pending data
+        while the pool and the log channel are still usable.
+        """
+        for cog in tuple(self.cogs.values()):
+            flush = getattr(cog, "flush", None)
+            if flush:
+                try:
+                    await flush()
+                except Exception:
+                    pass  # Never prevent the bot from closing
         await self.aio_session.close()
         await self.ksoft_client.close()
         for task in all_tasks(loop=self.loop):
@@ -328,6 +351,142 @@ class ChaoticBot(commands.Bot):
         )
         return payload.emoji.name == "\U00002705"
 
+    async def resolve_members(
+        self,
+        guild: discord.Guild,
+        member_ids: t.Iterable[int],
+    ) -> t.Dict[int, t.Optional[discord.Member]]:
+        """Get members by id, fetching the uncached ones concurrently.
+
+        Members that weren't found are None. Fetch results are cached.
+        """
+        now = monotonic()
+        if len(self.member_cache) > 10000:
+            self.member_cache = self.prune_cache(
+                self.member_cache,
+                lambda value: value[0],
+                now - self.member_ttl,
+            )
+        result: t.Dict[int, t.Optional[discord.Member]] = {}
+        missing: t.List[int] = []
+        for member_id in set(member_ids):
+            member = guild.get_member(member_id)
+            cached = self.member_cache.get((guild.id, member_id))
+            if member:
+                result[member_id] = member
+            elif cached and now - cached[0] < self.member_ttl:
+                result[member_id] = cached[1]
+            else:
+                missing.append(member_id)
+
+        async def fetch(member_id: int) -> None:
+            """Fetch a single member."""
+            async with self.member_semaphore:
+                try:
+                    member = await guild.fetch_member(member_id)
+                except discord.NotFound:
+                    member = None
+                except discord.HTTPException:
+                    result[member_id] = None
+                    return
+            self.member_cache[(guild.id, member_id)] = (monotonic(), member)
+            result[member_id] = member
+
+        await gather(*(fetch(member_id) for member_id in missing))
+        return result
+
+    async def resolve_member(
+        self,
+        guild: discord.Guild,
+        member_id: int,
+    ) -> t.Optional[discord.Member]:
+        """Get a member by id, or None if they aren't in the guild."""
+        return (await self.resolve_members(guild, (member_id, )))[member_id]
+
+    async def report_error(self, title: str, error: Exception) -> None:
+        """Log an error raised outside of a command, e.g. in a task."""
+        formatted_traceback = "".join(
+            traceback.format_tb(error.__traceback__))
+        embed = discord.Embed(
+            title=title,
+            description=(f"{type(error).__name__} : {error}"
+                         f"```\n{formatted_traceback}"[:2040] + "```"),
+            colour=0xFF0000,
+        )
+        embed.timestamp = datetime.utcnow()
+        try:
+            await self.log_channel.send(embed=embed)
+        except discord.DiscordException:
+            pass
+
+    async def use_cooldown(
+        self,
+        ctx: commands.Context,
+        cooldown: commands.Cooldown,
+    ) -> None:
+        """Start a persistent cooldown, or raise if it's already running.
+
+        The cooldown is stored in the database so that it survives restarts
+        and is shared between processes. Known cooldowns are cached so that
+        spamming a command doesn't hit the database.
+        """
+        key = (
+            ctx.command.qualified_name,
+            str(cooldown.type.get_key(ctx.message)),
+        )
+        now = time()
+        if len(self.cooldown_cache) > 10000:
+            self.cooldown_cache = self.prune_cache(
+                self.cooldown_cache,
+                lambda expiry: expiry,
+                now,
+            )
+        expiry = self.cooldown_cache.get(key, 0)
+        if expiry > now:
+            raise commands.CommandOnCooldown(cooldown, expiry - now)
+        if ctx.invoked_with not in {ctx.command.name, *ctx.command.aliases}:
+            return  # Checked by the help command, don't start the cooldown
+        async with self.pool.acquire(timeout=5) as database:
+            # DO UPDATE locks the row, so concurrent uses see each other
+            row = await database.fetchrow(
+                "INSERT INTO public.cooldowns VALUES ($1, $2, now() + "
+                "make_interval(secs => $3)) ON CONFLICT (command, bucket) DO "
+                "UPDATE SET expires_at=CASE WHEN cooldowns.expires_at<=now() "
+                "THEN EXCLUDED.expires_at ELSE cooldowns.expires_at END "
+                "RETURNING expires_at=now()+make_interval(secs => $3) AS "
+                "started, EXTRACT(EPOCH FROM expires_at-now()) AS retry_after",
+                key[0],
+                key[1],
+                cooldown.per,
+            )
+        if row["started"]:
+            self.cooldown_cache[key] = now + cooldown.per
+            return
+        retry_after = float(row["retry_after"])
+        self.cooldown_cache[key] = now + retry_after
+        raise commands.CommandOnCooldown(cooldown, retry_after)
+
+    @staticmethod
+    def prune_cache(
+        cache: t.Dict[t.Any, t.Any],
+        score: t.Callable[[t.Any], float],
+        threshold: float,
+        size: int = 5000,
+    ) -> t.Dict[t.Any, t.Any]:
+        """Drop the entries scoring below threshold.
+
+        If there are still more than `size` entries, only the `size` best
+        scoring ones are kept, so that pruning doesn't happen on every call.
+        """
+        kept = {
+            key: value
+            for key, value in cache.items() if score(value) > threshold
+        }
+        if len(kept) > size:
+            kept = dict(
+                nlargest(size, kept.items(), key=lambda item: score(item[1])))
+        return kept
+
     @staticmethod
     def get_id(ctx: t.Union[commands.Context, discord.Message]) -> int:
         """Get a context's id."""
@@ -21,12 +21,18 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
 import typing as t
+from datetime import datetime, timedelta
 from random import randint
-from time import time
+from time import monotonic, time
 
+import asyncpg
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+
+from bin.cooldown import persistent_cooldown
+from bin.keyset import KeysetSource, send_keyset_pages
 
 
 def p_vol(streak: int) -> float:
@@ -39,26 +45,23 @@ class Businessguy:
 
     def __init__(
         self,
-        sql: t.Dict[str, int],
+        sql: t.Optional[t.Mapping[str, int]],
         user: t.Union[discord.User, discord.Member],
         database: t.Any,
+        log: t.Optional[t.Callable[..., None]] = None,
     ) -> None:
         """Initialize the guy."""
         self.database = database
+        self.log = log
+        self.money = 0
+        self.bank = 0
+        self.bank_max = 5000
+        self.streak = 1
+        self.last_daily = 0
+        self.steal_streak = 0
+        self.updated_at: t.Optional[datetime] = None
         if sql:
-            self.money = sql["money"]
-            self.bank = sql["bank"]
-            self.bank_max = sql["bank_max"]
-            self.streak = sql["streak"]
-            self.last_daily = sql["last_daily"]
-            self.steal_streak = sql["steal_streak"]
-        else:
-            self.money = 0
-            self.bank = 0
-            self.bank_max = 5000
-            self.streak = 1
-            self.last_daily = 0
-            self.steal_streak = 0
+            self.load(sql)
         self.id = user.id
         self.name = str(user)
         self.avatar_url = str(user.avatar_url)
@@ -67,36 +70,60 @@ class Businessguy:
         """Are we equal."""
         return isinstance(other, Businessguy) and self.id == other.id
 
-    async def save(self) -> None:
-        """Commit the changes."""
-        await self.database.execute(
-            "INSERT INTO public.business VALUES ($1, $2, $3, $4, $5, $6, $7)"
-            " ON CONFLICT (id) DO UPDATE SET money=$2, bank=$3, bank_max=$4, "
-            "streak=$5, last_daily=$6, steal_streak=$7",
-            self.id,
-            self.money,
-            self.bank,
-            self.bank_max,
-            self.streak,
-            self.last_daily,
-            self.steal_streak,
-        )
+    def record(self, reason: str, money_change: int, bank_change: int) -> None:
+        """Write a change of our balance in the ledger."""
+        if self.log:
+            self.log(
+                self.id,
+                self.updated_at,
+                reason,
+                money_change,
+                bank_change,
+                self.money,
+                self.bank,
+            )
+
+    def load(self, sql: t.Mapping[str, t.Any]) -> None:
+        """Update the guy from a database row."""
+        self.money = sql["money"]
+        self.bank = sql["bank"]
+        self.bank_max = sql["bank_max"]
+        self.streak = sql["streak"]
+        self.last_daily = sql["last_daily"]
+        self.steal_streak = sql["steal_streak"]
+        self.updated_at = sql["updated_at"]
 
     async def daily(self) -> str:
         """Get your daily money."""
-        if time() < self.last_daily + 172800 and self.streak < 5:
-            self.streak += 1  # Less than a day
-        else:
-            self.streak = 1
-        self.last_daily = round(time())
-        self.money += 100 * self.streak
-        await self.save()
+        self.load(
+            await self.database.fetchrow(
+                "INSERT INTO public.business VALUES ($1, 100, 0, 5000, 1, $2,"
+                " 0, clock_timestamp()) ON CONFLICT (id) DO UPDATE SET "
+                "money=business.money+100*(CASE WHEN "
+                "$2<business.last_daily+172800 AND business.streak<5 THEN "
+                "business.streak+1 ELSE 1 END), streak=CASE WHEN "
+                "$2<business.last_daily+172800 AND business.streak<5 THEN "
+                "business.streak+1 ELSE 1 END, last_daily=$2, "
+                "updated_at=EXCLUDED.updated_at RETURNING *",
+                self.id,
+                round(time()),
+            )
+        )
+        self.record("daily", 100 * self.streak, 0)
         return f"You gained {100 * self.streak} GP"
 
     async def gift(self, guild: str) -> str:
         """Get the guild's daily money."""
-        self.money += 500
-        await self.save()
+        self.load(
+            await self.database.fetchrow(
+                "INSERT INTO public.business VALUES ($1, 500, 0, 5000, 1, 0, "
+                "0, clock_timestamp()) ON CONFLICT (id) DO UPDATE SET "
+                "money=business.money+500, updated_at=EXCLUDED.updated_at "
+                "RETURNING *",
+                self.id,
+            )
+        )
+        self.record("gift", 500, 0)
         return f"You took {guild}'s 500 daily GP."
 
     def money_out(self) -> discord.Embed:
@@ -109,32 +136,80 @@ class Businessguy:
 
     async def deposit(self, money: int) -> str:
         """Deposit some money."""
-        if self.money < money:
-            return f"Sorry, but you only have {self.money} GP"
-        deposit_max = self.bank_max - self.bank
-        if money <= deposit_max:
-            self.money -= money
-            self.bank += money
-            await self.save()
+        if money <= 0:
+            return "You can only deposit a positive amount of GP"
+        money = min(money, 2**31 - 1)  # Larger amounts don't fit an integer
+        row = await self.database.fetchrow(
+            "WITH deposit AS (SELECT id, LEAST($2, bank_max-bank) AS amount "
+            "FROM public.business WHERE id=$1 AND money>=$2 AND bank<bank_max"
+            " FOR UPDATE) UPDATE public.business SET "
+            "money=business.money-deposit.amount, "
+            "bank=business.bank+deposit.amount, updated_at=clock_timestamp() "
+            "FROM deposit WHERE "
+            "business.id=deposit.id RETURNING business.*, deposit.amount",
+            self.id,
+            money,
+        )
+        if not row:
+            row = await self.database.fetchrow(
+                "SELECT * FROM public.business WHERE id=$1",
+                self.id,
+            )
+            if row:
+                self.load(row)
+            if self.money < money:
+                return f"Sorry, but you only have {self.money} GP"
+            return f"Your bank is full (capacity of {self.bank_max} GP)"
+        self.load(row)
+        self.record("deposit", -row["amount"], row["amount"])
+        if row["amount"] == money:
             return f"{money} GP deposited"
-        self.money -= deposit_max
-        self.bank += deposit_max
-        await self.save()
         return (
-            f"{deposit_max} GP deposited. {deposit_max - money} "
-            "GP couldn't be deposited (capacity of {self.bank_max} GP"
+            f"{row['amount']} GP deposited. {money - row['amount']} "
+            f"GP couldn't be deposited (capacity of {self.bank_max} GP"
             " reached)"
         )
 
     async def steal(self, other: "Businessguy") -> int:
-        """Gimme your money."""
+        """Gimme your money.
+
+        Both rows must already be locked by the current transaction.
+        """
         stolen = randint(round(0.05 * other.money), round(0.1 * other.money))
-        self.money += stolen
-        other.money -= stolen
-        await self.save()
-        await other.save()
+        row = await self.database.fetchrow(
+            "WITH victim AS (UPDATE public.business SET money=money-$3, "
+            "updated_at=clock_timestamp() WHERE id=$2 AND money>=$3 "
+            "RETURNING id, money, updated_at), thief AS (INSERT INTO "
+            "public.business SELECT $1, $3, 0, 5000, 1, 0, 1, "
+            "clock_timestamp() FROM victim ON CONFLICT (id) DO UPDATE SET "
+            "money=business.money+EXCLUDED.money, "
+            "steal_streak=business.steal_streak+1, "
+            "updated_at=EXCLUDED.updated_at RETURNING *) SELECT thief.*, "
+            "victim.money AS victim_money, victim.updated_at AS "
+            "victim_updated_at FROM thief, victim",
+            self.id,
+            other.id,
+            stolen,
+        )
+        if not row:
+            return 0
+        self.load(row)
+        other.money = row["victim_money"]
+        other.updated_at = row["victim_updated_at"]
+        self.record("steal", stolen, 0)
+        other.record("stolen", -stolen, 0)
         return stolen
 
+    async def get_caught(self) -> None:
+        """Reset the steal streak."""
+        self.load(
+            await self.database.fetchrow(
+                "INSERT INTO public.business VALUES ($1, 0, 0, 5000, 1, 0, 0)"
+                " ON CONFLICT (id) DO UPDATE SET steal_streak=0 RETURNING *",
+                self.id,
+            )
+        )
+
 
 class Business(commands.Cog):
     """Some commands involving money."""
@@ -142,6 +217,300 @@ class Business(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize Business."""
         self.bot = bot
+        self.seen_members: t.Set[t.Tuple[int, int]] = set()
+        # Members that used an economy command since the last update
+        self.ledger: t.List[t.Tuple[
+            int, datetime, str, int, int, int, int]] = []
+        # Ledger entries waiting to be written
+        self.reconciliation_delay = timedelta(minutes=10)
+        # Balances changed more recently may still have buffered entries
+        self.interest_chunk = 1000
+        # Number of accounts credited by each statement of the interest job
+        self.leaderboard_update.start()
+        self.ledger_flush.start()
+        self.bank_interest.start()
+        self.ledger_reconciliation.start()
+
+    def cog_unload(self) -> None:
+        """Stop updating the leaderboards, and write the ledger."""
+        self.leaderboard_update.cancel()
+        self.ledger_flush.cancel()
+        self.bank_interest.cancel()
+        self.ledger_reconciliation.cancel()
+        asyncio.create_task(self.flush_ledger())
+
+    async def flush(self) -> None:
+        """Write the ledger before the bot closes."""
+        await self.flush_ledger()
+
+    def log(
+        self,
+        user_id: int,
+        created_at: datetime,
+        reason: str,
+        money_change: int,
+        bank_change: int,
+        money: int,
+        bank: int,
+    ) -> None:
+        """Add an entry to the ledger, with the balance after the change.
+
+        `created_at` is the `updated_at` of the balance, which the
+        reconciliation matches against the ledger.
+        """
+        self.ledger.append((
+            user_id,
+            created_at,
+            reason,
+            money_change,
+            bank_change,
+            money,
+            bank,
+        ))
+
+    @tasks.loop(seconds=30)
+    async def ledger_flush(self) -> None:
+        """Periodically write the ledger."""
+        await self.flush_ledger()
+
+    async def flush_ledger(self) -> None:
+        """Write the pending ledger entries in a single COPY."""
+        if not self.ledger:
+            return
+        ledger, self.ledger = self.ledger, []
+        try:
+            async with self.bot.pool.acquire() as database:
+                await database.copy_records_to_table(
+                    "ledger",
+                    schema_name="public",
+                    records=ledger,
+                    columns=(
+                        "user_id",
+                        "created_at",
+                        "reason",
+                        "money_change",
+                        "bank_change",
+                        "money",
+                        "bank",
+                    ),
+                )
+        except Exception as error:
+            # Raising would stop ledger_flush for good
+            self.ledger[:0] = ledger
+            await self.bot.report_error("Couldn't write the ledger", error)
+
+    @ledger_flush.before_loop
+    async def before_ledger_flush(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=1)
+    async def ledger_reconciliation(self) -> None:
+        """Rebuild the balances that drifted from the ledger.
+
+        Only the balances changed since the last check are checked, once
+        they have been left alone long enough for every process to have
+        written their ledger entries. A balance that doesn't match its last
+        ledger entry, e.g. because an entry was lost in a crash, is set back
+        to that entry.
+        """
+        await self.flush_ledger()
+        try:
+            rebuilt = await self.reconcile_ledger()
+        except Exception as error:
+            # Raising would stop ledger_reconciliation for good
+            await self.bot.report_error("Couldn't check the ledger", error)
+            return
+        if rebuilt:
+            try:
+                await self.bot.log_channel.send(
+                    f"{rebuilt} balances didn't match the ledger, and were "
+                    "rebuilt from it")
+            except discord.HTTPException:
+                pass
+
+    async def reconcile_ledger(self) -> int:
+        """Run the reconciliation, and return how many balances were rebuilt."""
+        async with self.bot.pool.acquire() as database:
+            # Only one process checks the ledger at once
+            if not await database.fetchval(
+                "SELECT pg_try_advisory_lock("
+                "hashtext('ledger_reconciliation'))"
+            ):
+                return 0
+            try:
+                async with database.transaction():
+                    checkpoint = await database.fetchval(
+                        "SELECT reconciled_at FROM "
+                        "public.ledger_reconciliation FOR UPDATE"
+                    )
+                    # The WHERE clause is checked again against rows
+                    # changed concurrently, which are then left alone
+                    rows = await database.fetch(
+                        "UPDATE public.business SET money=latest.money, "
+                        "bank=latest.bank, updated_at=latest.created_at FROM"
+                        " (SELECT business.id, entry.money, entry.bank, "
+                        "entry.created_at FROM public.business CROSS JOIN "
+                        "LATERAL (SELECT money, bank, created_at FROM "
+                        "public.ledger WHERE user_id=business.id ORDER BY "
+                        "created_at DESC, id DESC LIMIT 1) AS entry WHERE "
+                        "business.updated_at>$1 AND business.updated_at<="
+                        "now()-$2::interval AND (business.money, "
+                        "business.bank)<>(entry.money, entry.bank)) AS "
+                        "latest WHERE business.id=latest.id AND "
+                        "business.updated_at<=now()-$2::interval RETURNING "
+                        "business.id",
+                        checkpoint,
+                        self.reconciliation_delay,
+                    )
+                    await database.execute(
+                        "UPDATE public.ledger_reconciliation SET "
+                        "reconciled_at=now()-$1::interval",
+                        self.reconciliation_delay,
+                    )
+            finally:
+                await database.execute(
+                    "SELECT pg_advisory_unlock("
+                    "hashtext('ledger_reconciliation'))"
+                )
+        return len(rows)
+
+    @ledger_reconciliation.before_loop
+    async def before_ledger_reconciliation(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=1)
+    async def bank_interest(self) -> None:
+        """Credit 1% of interest (at least 1 GP) to every bank once a day.
+
+        Accounts are credited by chunks of consecutive ids, each in its own
+        statement, so that rows are only locked for a short time. Each chunk
+        writes its ledger entries and saves the progress of the run in the
+        same statement, so an interrupted run is resumed without gaps.
+        """
+        try:
+            await self.credit_interest()
+        except Exception as error:
+            # Raising would stop bank_interest for good
+            await self.bot.report_error("Couldn't credit the interest", error)
+
+    async def credit_interest(self) -> None:
+        """Run or resume the daily interest job, on a single connection."""
+        async with self.bot.pool.acquire() as database:
+            # Only one process runs the job at once
+            if not await database.fetchval(
+                    "SELECT pg_try_advisory_lock(hashtext('bank_interest'))"):
+                return
+            try:
+                await self.interest_run(database)
+            finally:
+                await database.execute(
+                    "SELECT pg_advisory_unlock(hashtext('bank_interest'))")
+
+    async def interest_run(self, database: t.Any) -> None:
+        """Credit the interest, chunk by chunk."""
+        run = await database.fetchrow(
+            "SELECT * FROM public.interest_runs ORDER BY started_at DESC "
+            "LIMIT 1"
+        )
+        if run and run["finished_at"]:
+            run = await database.fetchrow(
+                "INSERT INTO public.interest_runs (started_at) SELECT "
+                "now() WHERE $1<now()-interval '1 day' RETURNING *",
+                run["started_at"],
+            )
+        elif not run:
+            run = await database.fetchrow(
+                "INSERT INTO public.interest_runs (started_at) VALUES "
+                "(now()) RETURNING *"
+            )
+        if not run:
+            return  # Already paid today
+        start = monotonic()
+        while True:
+            rows = await database.fetch(
+                "WITH chunk AS (SELECT id, bank FROM public.business "
+                "WHERE id>(SELECT last_id FROM public.interest_runs WHERE"
+                " started_at=$1) AND bank>0 AND bank<bank_max ORDER BY id"
+                " LIMIT $2 FOR UPDATE), credited AS (UPDATE "
+                "public.business SET bank=LEAST(bank_max, "
+                "business.bank+GREATEST(business.bank/100, 1)), "
+                "updated_at=clock_timestamp() FROM chunk WHERE "
+                "business.id=chunk.id RETURNING business.id, business.money,"
+                " business.bank, business.bank-chunk.bank AS interest, "
+                "business.updated_at), entries AS (INSERT INTO public.ledger"
+                " (user_id, created_at, reason, money_change, bank_change, "
+                "money, bank) SELECT id, updated_at, 'interest', 0, interest,"
+                " money, bank FROM credited), progress AS (UPDATE "
+                "public.interest_runs SET last_id=(SELECT max(id) FROM "
+                "credited), accounts=accounts+(SELECT count(*) FROM "
+                "credited) WHERE started_at=$1 AND EXISTS (SELECT 1 FROM "
+                "credited)) SELECT id FROM credited",
+                run["started_at"],
+                self.interest_chunk,
+            )
+            if not rows:
+                break
+        await database.execute(
+            "UPDATE public.interest_runs SET finished_at=now(), "
+            "duration=duration+$2 WHERE started_at=$1",
+            run["started_at"],
+            monotonic() - start,
+        )
+
+    @bank_interest.before_loop
+    async def before_bank_interest(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        """Remember who plays in each guild, for the leaderboards."""
+        if ctx.guild:
+            self.seen_members.add((ctx.guild.id, ctx.author.id))
+
+    @tasks.loop(minutes=10)
+    async def leaderboard_update(self) -> None:
+        """Rank the members of the guilds that were active recently."""
+        if not self.seen_members:
+            return
+        seen, self.seen_members = self.seen_members, set()
+        guild_ids, user_ids = zip(*seen)
+        try:
+            async with self.bot.pool.acquire() as database:
+                async with database.transaction():
+                    await database.execute(
+                        "INSERT INTO public.business_members SELECT * FROM "
+                        "UNNEST($1::bigint[], $2::bigint[]) ON CONFLICT DO "
+                        "NOTHING",
+                        guild_ids,
+                        user_ids,
+                    )
+                    await database.execute(
+                        "DELETE FROM public.leaderboards WHERE "
+                        "guild_id=ANY($1)",
+                        set(guild_ids),
+                    )
+                    await database.execute(
+                        "INSERT INTO public.leaderboards SELECT "
+                        "business_members.guild_id, row_number() OVER "
+                        "(PARTITION BY business_members.guild_id ORDER BY "
+                        "money+bank DESC, id), id, money+bank FROM "
+                        "public.business_members JOIN public.business ON "
+                        "business.id=business_members.user_id WHERE "
+                        "business_members.guild_id=ANY($1)",
+                        set(guild_ids),
+                    )
+        except Exception as error:
+            # Raising would stop leaderboard_update for good
+            self.seen_members |= seen
+            await self.bot.report_error(
+                "Couldn't update the leaderboards", error)
+
+    @leaderboard_update.before_loop
+    async def before_leaderboard_update(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
 
     async def _fetcher(self, identifier: int, database: t.Any) -> t.Dict[str, t.Any]:
         """Fetch the guy's data."""
@@ -151,37 +520,27 @@ class Business(commands.Cog):
         )
 
     @commands.command(ignore_extra=True)
-    @commands.cooldown(1, 86400, commands.BucketType.user)
+    @persistent_cooldown(86400, commands.BucketType.user)
     async def daily(self, ctx: commands.Context) -> None:
         """Get your daily GP (100 * streak, max : 500)."""
         async with self.bot.pool.acquire(timeout=5) as database:
-            business = Businessguy(
-                await self._fetcher(ctx.author.id, database),
-                ctx.author,
-                database,
-            )
+            business = Businessguy(None, ctx.author, database, self.log)
             await ctx.send(await business.daily())
 
     @commands.command()
     async def deposit(self, ctx: commands.Context, money: int) -> None:
         """Deposit your money in a safe at the bank."""
         async with self.bot.pool.acquire(timeout=5) as database:
-            business = Businessguy(
-                await self._fetcher(ctx.author.id, database),
-                ctx.author,
-                database,
-            )
+            business = Businessguy(None, ctx.author, database, self.log)
             await ctx.send(await business.deposit(money))
 
     @commands.command(ignore_extra=True)
     @commands.guild_only()
-    @commands.cooldown(1, 86400, commands.BucketType.guild)
+    @persistent_cooldown(86400, commands.BucketType.guild)
     async def gift(self, ctx: commands.Context) -> None:
         """Get the guild's 500 GP of daily gift."""
         async with self.bot.pool.acquire(timeout=5) as database:
-            business = Businessguy(
-                await self._fetcher(ctx.author.id, database), ctx.author, database
-            )
+            business = Businessguy(None, ctx.author, database, self.log)
             await ctx.send(await business.gift(ctx.guild.name))
 
     @commands.command(ignore_extra=True)
@@ -197,6 +556,150 @@ class Business(commands.Cog):
             embed.set_thumbnail(url=str(ctx.bot.user.avatar_url))
             await ctx.send(embed=embed)
 
+    @commands.command(ignore_extra=True)
+    async def transactions(self, ctx: commands.Context) -> None:
+        """See the history of your GP, most recent first."""
+        await self.flush_ledger()
+        source = KeysetSource(
+            self.bot.pool,
+            "SELECT id, created_at, reason, money_change, bank_change, money,"
+            " bank FROM public.ledger WHERE user_id=$1 AND id<$2 ORDER BY id "
+            "DESC LIMIT $3",
+            (ctx.author.id, ),
+            (2**63 - 1, ),
+            lambda row: (row["id"], ),
+            f"{ctx.author}'s transactions",
+            self.format_transaction,
+        )
+        await send_keyset_pages(
+            ctx,
+            source,
+            "You don't have any transactions yet",
+        )
+
+    @staticmethod
+    def format_transaction(index: int, row: asyncpg.Record) -> str:
+        """Format a ledger entry."""
+        changes = []
+        if row["money_change"]:
+            changes.append(f"{row['money_change']:+} GP pocketed")
+        if row["bank_change"]:
+            changes.append(f"{row['bank_change']:+} GP banked")
+        return (
+            f"{index}. `{row['created_at']:%Y-%m-%d %H:%M}` {row['reason']} :"
+            f" {', '.join(changes) or 'nothing'} (now {row['money']} "
+            f"pocketed, {row['bank']} banked)"
+        )
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    async def leaderboard(self, ctx: commands.Context) -> None:
+        """See the richest members of this guild.
+
+        The guild leaderboard is updated every 10 minutes.
+        """
+        async with self.bot.pool.acquire(timeout=5) as database:
+            rows = await database.fetch(
+                "SELECT user_id, total FROM public.leaderboards WHERE "
+                "guild_id=$1 ORDER BY rank LIMIT 10",
+                ctx.guild.id,
+            )
+        if not rows:
+            await ctx.send(
+                "Nobody is ranked in this guild yet. Come back in a few "
+                "minutes")
+            return
+        members = await self.bot.resolve_members(
+            ctx.guild,
+            (row["user_id"] for row in rows),
+        )
+        await ctx.send(
+            embed=self.leaderboard_embed(
+                f"{ctx.guild.name}'s leaderboard",
+                [(members[row["user_id"]], row["user_id"], row["total"])
+                 for row in rows],
+            )
+        )
+
+    @leaderboard.command(name="global", ignore_extra=True)
+    async def leaderboard_global(self, ctx: commands.Context) -> None:
+        """See the richest users of the bot."""
+        async with self.bot.pool.acquire(timeout=5) as database:
+            rows = await database.fetch(
+                "SELECT id, money+bank AS total FROM public.business "
+                "ORDER BY money+bank DESC LIMIT 10"
+            )
+        await ctx.send(
+            embed=self.leaderboard_embed(
+                "Global leaderboard",
+                [(self.bot.get_user(row["id"]), row["id"], row["total"])
+                 for row in rows],
+            )
+        )
+
+    @staticmethod
+    def leaderboard_embed(
+        title: str,
+        ranking: t.List[t.Tuple[t.Optional[discord.abc.User], int, int]],
+    ) -> discord.Embed:
+        """Create a leaderboard's embed."""
+        return discord.Embed(
+            title=title,
+            description="\n".join(
+                f"**{index}.** {user or f'Unknown user ({user_id})'} : "
+                f"{total} GP"
+                for index, (user, user_id, total) in enumerate(ranking, 1)
+            ) or "Nobody has any GP yet",
+            colour=0x00008B,
+        )
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    async def rank(
+        self,
+        ctx: commands.Context,
+        member: t.Optional[discord.Member] = None,
+    ) -> None:
+        """See your rank (or someone else's) in this guild."""
+        member = member or ctx.author
+        async with self.bot.pool.acquire(timeout=5) as database:
+            row = await database.fetchrow(
+                "SELECT rank, total FROM public.leaderboards WHERE guild_id=$1"
+                " AND user_id=$2",
+                ctx.guild.id,
+                member.id,
+            )
+        if not row:
+            await ctx.send(
+                f"{member.display_name} isn't ranked in this guild yet. The "
+                "leaderboard is updated every 10 minutes")
+            return
+        await ctx.send(
+            f"{member.display_name} is #{row['rank']} in {ctx.guild.name} "
+            f"with {row['total']} GP"
+        )
+
+    @rank.command(name="global")
+    async def rank_global(
+        self,
+        ctx: commands.Context,
+        user: t.Optional[discord.User] = None,
+    ) -> None:
+        """See your rank (or someone else's) among all users."""
+        user = user or ctx.author
+        async with self.bot.pool.acquire(timeout=5) as database:
+            row = await database.fetchrow(
+                "SELECT money+bank AS total, (SELECT count(*) FROM "
+                "public.business AS other WHERE "
+                "other.money+other.bank>business.money+business.bank)+1 AS "
+                "rank FROM public.business WHERE id=$1",
+                user.id,
+            )
+        if not row:
+            await ctx.send(f"{user} doesn't have any GP")
+            return
+        await ctx.send(f"{user} is #{row['rank']} with {row['total']} GP")
+
     @commands.command()
     @commands.cooldown(1, 600, commands.BucketType.user)
     @commands.guild_only()
@@ -206,48 +709,65 @@ class Business(commands.Cog):
         victim: discord.Member,
     ) -> None:
         """Stealing is much more gainful than killing."""
-        async with self.bot.pool.acquire(timeout=5) as database:
-            pickpocket = Businessguy(
-                await self._fetcher(ctx.author.id, database),
-                ctx.author,
-                database,
-            )
-            stolen = Businessguy(
-                await self._fetcher(victim.id, database),
-                victim,
-                database,
-            )
-            if pickpocket == stolen:
-                self.steal.reset_cooldown(ctx)
-                await ctx.send("Are you seriously tring to steal yourself ?")
-                return
-            if stolen.money == 0:
-                self.steal.reset_cooldown(ctx)
-                await ctx.send(
-                    f"`{victim.display_name}` doesn't have money on him. "
-                    "What a shame."
-                )
-                return
+        if victim.id == ctx.author.id:
+            self.steal.reset_cooldown(ctx)
+            await ctx.send("Are you seriously tring to steal yourself ?")
+            return
+        entries: t.List[t.Tuple[t.Any, ...]] = []
 
-            threshold = p_vol(pickpocket.steal_streak)
-            if victim.status == discord.Status.offline:
-                threshold -= 10
-            if randint(1, 100) < threshold:
-                pickpocket.steal_streak = 0
-                await pickpocket.save()
-                await ctx.send(
-                    "You failed in your attempt to steal "
-                    f"{victim.display_name}."
-                    " He hit you, so you must now wait 10 minutes to regain "
-                    "your usual sneakiness"
-                )
-            else:
-                self.steal.reset_cooldown(ctx)
-                pickpocket.steal_streak += 1
-                await ctx.send(
-                    f"You robbed `{await pickpocket.steal(stolen)}` GP from "
-                    f"{victim.display_name}"
+        def log(*entry: t.Any) -> None:
+            """Keep the ledger entries until the transaction commits."""
+            entries.append(entry)
+
+        async with self.bot.pool.acquire(timeout=5) as database:
+            async with database.transaction():
+                # Lock both rows in id order so that concurrent steals
+                # between the same two people can't deadlock
+                rows = {
+                    row["id"]: row
+                    for row in await database.fetch(
+                        "SELECT * FROM public.business WHERE id=ANY($1) "
+                        "ORDER BY id FOR UPDATE",
+                        [ctx.author.id, victim.id],
+                    )
+                }
+                pickpocket = Businessguy(
+                    rows.get(ctx.author.id),
+                    ctx.author,
+                    database,
+                    log,
                 )
+                stolen = Businessguy(rows.get(victim.id), victim, database, log)
+                if stolen.money == 0:
+                    message = (
+                        f"`{victim.display_name}` doesn't have money on him. "
+                        "What a shame."
+                    )
+                    caught = False
+                else:
+                    threshold = p_vol(pickpocket.steal_streak)
+                    if victim.status == discord.Status.offline:
+                        threshold -= 10
+                    caught = randint(1, 100) < threshold
+                    if caught:
+                        await pickpocket.get_caught()
+                        message = (
+                            "You failed in your attempt to steal "
+                            f"{victim.display_name}."
+                            " He hit you, so you must now wait 10 minutes to "
+                            "regain your usual sneakiness"
+                        )
+                    else:
+                        message = (
+                            f"You robbed `{await pickpocket.steal(stolen)}` "
+                            f"GP from {victim.display_name}"
+                        )
+        for entry in entries:
+            self.log(*entry)
+        # Only talk to Discord once the rows are unlocked
+        if not caught:
+            self.steal.reset_cooldown(ctx)
+        await ctx.send(message)
 
     @steal.error
     async def steal_error(self, ctx: commands.Context, error: Exception):
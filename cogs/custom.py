@@ -23,13 +23,53 @@ SOFTWARE.
 
 import asyncio
 import re
+import string
 import typing as t
 
 import discord
 from discord.ext import commands
+from discord.ext.commands.view import StringView
 from pytz import utc
 
 
+Template = t.List[t.Tuple[str, t.Optional[str], str, t.Optional[str]]]
+
+CONTEXT_FIELDS = frozenset({"author", "guild", "server", "message"})
+
+
+def compile_effect(effect: str, arguments: t.Iterable[str]) -> Template:
+    """Parse and validate the effect of a custom command.
+
+    Raise ValueError if the effect isn't a valid template.
+    """
+    names = CONTEXT_FIELDS.union(arguments)
+    template: Template = list(string.Formatter().parse(effect))
+    for _, field, spec, _ in template:
+        if field is None:
+            continue
+        root = re.split(r"[.\[]", field, maxsplit=1)[0]
+        if root not in names:
+            raise ValueError(f"`{{{field}}}` doesn't refer to an argument")
+        if re.search(r"[.\[]_", field):
+            raise ValueError(f"`{{{field}}}` refers to a private attribute")
+        if "{" in spec:
+            raise ValueError(f"`{{{field}}}` has a nested format")
+    return template
+
+
+def render(template: Template, values: t.Dict[str, t.Any]) -> str:
+    """Substitute the values in a compiled effect."""
+    formatter = string.Formatter()
+    parts: t.List[str] = []
+    for literal, field, spec, conversion in template:
+        parts.append(literal)
+        if field is not None:
+            value, _ = formatter.get_field(field, (), values)
+            value = formatter.convert_field(value, conversion)
+            parts.append(formatter.format_field(value, spec))
+    return "".join(parts)
+
+
 class Custom(commands.Cog):
     """Create your own commands."""
 
@@ -43,6 +83,22 @@ class Custom(commands.Cog):
             "role": commands.RoleConverter,
             "int": int,
         }
+        self.names: t.Dict[int, t.Set[str]] = {}
+        # Names of the custom commands of each guild, loaded lazily
+        self.templates: t.Dict[t.Tuple[int, str], t.Tuple[
+            int, t.List[t.Tuple[str, str]], Template]] = {}
+        # Owner, arguments and compiled effect of the invoked commands
+
+    async def get_names(self, guild_id: int) -> t.Set[str]:
+        """Get the names of a guild's custom commands."""
+        if guild_id not in self.names:
+            async with self.bot.pool.acquire() as database:
+                rows = await database.fetch(
+                    "SELECT name FROM public.custom WHERE guild_id=$1",
+                    guild_id,
+                )
+            self.names[guild_id] = {row["name"] for row in rows}
+        return self.names[guild_id]
 
     def cog_check(self, ctx: commands.Context) -> bool:
         """Use these commands in a guild."""
@@ -151,6 +207,12 @@ class Custom(commands.Cog):
             await ctx.send("You took too long to reply. I'm aborting this")
             return
 
+        try:
+            compile_effect(effect, (arg_name for arg_name, _ in arguments))
+        except ValueError as error:
+            await ctx.send(f":x: This effect isn't valid : {error}")
+            return
+
         async with self.bot.pool.acquire() as database:
             row = await database.fetchrow(
                 "SELECT * FROM public.custom WHERE guild_id=$1 AND name=$2",
@@ -170,6 +232,8 @@ class Custom(commands.Cog):
                 arguments,
                 effect,
             )
+        if ctx.guild.id in self.names:
+            self.names[ctx.guild.id].add(name)
         await ctx.send(f"Custom command {name} created successfully")
 
     @custom.command()
@@ -195,6 +259,8 @@ class Custom(commands.Cog):
                 ctx.guild.id,
                 ctx.author.id,
             )
+        self.names.get(ctx.guild.id, set()).discard(name)
+        self.templates.pop((ctx.guild.id, name), None)
         await ctx.send(f"Custom command {name} successfully deleted")
 
     @custom.command()
@@ -216,15 +282,13 @@ class Custom(commands.Cog):
             (discord.Embed.Empty),
             colour=0x00008B,
         )
-        try:
-            owner = ctx.guild.get_member(
-                command["owner_id"]) or (await ctx.guild.fetch_member(
-                    command["owner_id"]))
+        owner = await self.bot.resolve_member(ctx.guild, command["owner_id"])
+        if owner:
             embed.set_author(
                 name=owner.display_name,
                 icon_url=str(owner.avatar_url),
             )
-        except discord.NotFound:
+        else:
             embed.set_author(
                 name="Unclaimed command",
                 icon_url=str(ctx.bot.user.avatar_url),
@@ -244,78 +308,114 @@ class Custom(commands.Cog):
         if message.author.bot:
             return
 
-        async with self.bot.pool.acquire() as database:
-            command = await database.fetchrow(
-                "SELECT * FROM public.custom WHERE guild_id=$1 AND name=$2",
-                message.guild.id,
-                message.content[len(prefix):].split(" ")[0],
-            )
+        name = message.content[len(prefix):].split(" ")[0]
+        if name in self.bot.all_commands or (name not in await
+                                             self.get_names(message.guild.id)):
+            return
+
+        compiled = self.templates.get((message.guild.id, name))
+        if not compiled:
+            async with self.bot.pool.acquire() as database:
+                command = await database.fetchrow(
+                    "SELECT * FROM public.custom WHERE guild_id=$1 AND name=$2",
+                    message.guild.id,
+                    name,
+                )
             if not command:
                 return
+            try:
+                template = compile_effect(
+                    command["effect"],
+                    (arg_name for arg_name, _ in command["arguments"]),
+                )
+            except ValueError:
+                await self.report_error(
+                    message, command["owner_id"],
+                    "The custom command isn't correctly formatted")
+                return
+            compiled = self.templates[(message.guild.id, name)] = (
+                command["owner_id"],
+                command["arguments"],
+                template,
+            )
 
-        effect: str = command["effect"]
-        full_args: t.List[t.Tuple[str, str]] = command["arguments"]
-
-        kwargs = {}
-        args = message.content.split(" ")[1:]
-        arg_n = 0
+        owner_id, full_args, template = compiled
+        view = StringView(message.content)
+        view.skip_string(prefix)
+        view.get_word()
+        args: t.List[str] = []
+        try:
+            for _ in full_args:
+                view.skip_ws()
+                arg = view.get_quoted_word()
+                if arg is None:
+                    await message.channel.send(
+                        "You didn't provide enough arguments")
+                    return
+                args.append(arg)
+        except commands.ArgumentParsingError as error:
+            await message.channel.send(str(error))
+            return
 
         ctx = await self.bot.get_context(message)
 
-        arg = None
-        raw_type = ""
-
-        try:
-            for name, raw_type in full_args:
-                arg = args[arg_n]
-                arg_n += 1
-                converter = self.type_dict.get(raw_type, str)
-                if converter in {str, int}:
-                    kwargs[name] = converter(arg)
-                else:
-                    kwargs[name] = await converter().convert(ctx, arg)
-        except ValueError:
-            await message.channel.send(f"Couldn't convert {arg} to int")
-            return
-        except IndexError:
-            await message.channel.send("You didn't provide enough arguments")
-            return
-        except commands.BadArgument:
-            await message.channel.send(
-                f"Couldn't convert {arg} into {raw_type.capitalize()}")
-            return
+        async def convert(arg: str, raw_type: str) -> t.Any:
+            """Convert a single argument."""
+            converter = self.type_dict.get(raw_type, str)
+            if converter in {str, int}:
+                return converter(arg)
+            return await converter().convert(ctx, arg)
+
+        results = await asyncio.gather(
+            *(convert(arg, raw_type)
+              for arg, (_, raw_type) in zip(args, full_args)),
+            return_exceptions=True,
+        )
+        kwargs = {}
+        for arg, (arg_name, raw_type), result in zip(args, full_args,
+                                                     results):
+            if isinstance(result, ValueError):
+                await message.channel.send(f"Couldn't convert {arg} to int")
+                return
+            if isinstance(result, commands.BadArgument):
+                await message.channel.send(
+                    f"Couldn't convert {arg} into {raw_type.capitalize()}")
+                return
+            if isinstance(result, Exception):
+                raise result
+            kwargs[arg_name] = result
 
         try:
             await message.channel.send(
-                effect.format(
-                    author=message.author,
-                    guild=message.guild,
-                    server=message.guild,
-                    message=message.content,
-                    **kwargs,
+                render(
+                    template,
+                    {
+                        "author": message.author,
+                        "guild": message.guild,
+                        "server": message.guild,
+                        "message": message.content,
+                        **kwargs,
+                    },
                 ))
         except ValueError:
-            try:
-                owner = self.bot.get_user(
-                    command["owner_id"]) or (await self.bot.fetch_user(
-                        command["owner_id"]))
-                await message.channel.send(
-                    "The custom command isn't correctly formatted. Please "
-                    f"contact {owner.mention} about that issue")
-            except discord.NotFound:
-                await message.channel.send("The custom command raised an error"
-                                           )
-        except (discord.DiscordException, KeyError):
-            try:
-                owner = self.bot.get_user(
-                    command["owner_id"]) or (await self.bot.fetch_user(
-                        command["owner_id"]))
-                await message.channel.send(
-                    "The custom command raised an error. Please contact "
-                    f"{owner.mention} about that issue")
-            except discord.NotFound:
-                await message.channel.send("The custom command raised an error"
-                                           )
+            await self.report_error(
+                message, owner_id,
+                "The custom command isn't correctly formatted")
+        except (discord.DiscordException, AttributeError, IndexError,
+                KeyError, TypeError):
+            await self.report_error(message, owner_id,
+                                    "The custom command raised an error")
+
+    async def report_error(self, message: discord.Message, owner_id: int,
+                           error: str) -> None:
+        """Tell the user to contact the owner of a broken custom command."""
+        try:
+            owner = self.bot.get_user(owner_id) or (
+                await self.bot.fetch_user(owner_id))
+            await message.channel.send(
+                f"{error}. Please contact {owner.mention} about that issue")
+        except discord.NotFound:
+            await message.channel.send("The custom command raised an error")
 
 
 def setup(bot: commands.Bot) -> None:
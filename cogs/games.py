@@ -863,30 +863,45 @@ class Games(commands.Cog):
             clear_reactions_after=True,
         ).prompt(ctx)
         async with self.bot.pool.acquire() as database:
-            for player_id in balance_dict:
-                if balance_dict[player_id] >= 0:
-                    await database.execute(
-                        "UPDATE public.business SET money=money+$2 WHERE id=$1",
-                        player_id,
-                        balance_dict[player_id],
-                    )
-                else:
-                    row = await database.fetchrow(
-                        "SELECT * FROM public.business WHERE id=$1", player_id
-                    )
-                    if row["money"] >= -balance_dict[player_id]:
-                        await database.execute(
-                            "UPDATE public.business SET money=money+$2 WHERE id=$1",
-                            player_id,
-                            balance_dict[player_id],
-                        )
-                    else:
-                        await database.execute(
-                            "UPDATE public.business SET money=0, bank=bank+$2"
-                            " WHERE id=$1",
-                            player_id,
-                            row["money"] + balance_dict[player_id],
-                        )
+            async with database.transaction():
+                # Losses are taken from the wallet, then from the bank
+                rows = await database.fetch(
+                    "WITH balance AS (SELECT business.id, business.money, "
+                    "balance.amount FROM public.business JOIN "
+                    "UNNEST($1::bigint[], $2::int[]) AS balance(id, amount) "
+                    "ON business.id=balance.id ORDER BY business.id FOR "
+                    "UPDATE OF business) UPDATE public.business SET "
+                    "money=GREATEST(balance.money+balance.amount, 0), "
+                    "bank=business.bank+LEAST(balance.money+balance.amount, "
+                    "0), updated_at=clock_timestamp() FROM balance WHERE "
+                    "business.id=balance.id RETURNING business.id, "
+                    "business.money, business.bank, business.updated_at, "
+                    "balance.amount, LEAST(balance.money+balance.amount, 0) "
+                    "AS bank_change",
+                    list(balance_dict),
+                    list(balance_dict.values()),
+                )
+        business = self.bot.get_cog("Business")
+        if business:
+            for row in rows:
+                business.log(
+                    row["id"],
+                    row["updated_at"],
+                    "blackjack",
+                    row["amount"] - row["bank_change"],
+                    row["bank_change"],
+                    row["money"],
+                    row["bank"],
+                )
+        names = {player.id: player.display_name for player in players}
+        await ctx.send(
+            "Final balances :\n"
+            + "\n".join(
+                f"- {names.get(row['id'], row['id'])} : {row['money']} GP "
+                f"pocketed, {row['bank']} GP banked"
+                for row in rows
+            )
+        )
 
     @tasks.loop(seconds=5)
     async def blackjack_updater(self) -> None:
@@ -22,11 +22,14 @@ SOFTWARE.
 """
 
 import asyncio
+import re
+import shlex
 import typing as t
-from datetime import datetime
+from datetime import datetime, timedelta
+from time import monotonic
 
 import discord
-from discord.ext import commands, menus
+from discord.ext import commands, menus, tasks
 from discord.utils import find
 
 auto_swear_detection = frozenset({
@@ -484,6 +487,14 @@ auto_swear_detection = frozenset({
 })
 
 
+def capped_list(items: t.Iterable[str], limit: int = 20) -> str:
+    """Join the first items, mentioning how many others were left out."""
+    items = list(items)
+    if len(items) <= limit:
+        return ", ".join(items)
+    return f"{', '.join(items[:limit])} and {len(items) - limit} more"
+
+
 class RoleSource(menus.ListPageSource):
     """Source for the role rule list."""
 
@@ -525,6 +536,19 @@ class Moderation(commands.Cog):
         self._role_save_lock: t.Any = None
         self._swear_conn: t.Any = None
         self._swear_conn_lock: t.Any = None
+        self._role_jobs: t.Dict[t.Tuple[int, str], asyncio.Task] = {}
+
+        self.role_concurrency = 4
+        # Number of members edited at once, adapted to the rate limits
+        self.role_chunk_time = 2
+        # Seconds after which a chunk is considered rate limited
+
+        self._rule_messages: t.Dict[int, t.Tuple[float, bool]] = {}
+        self._swear_queues: t.Dict[int, t.List[t.Tuple[discord.Message,
+                                                       str]]] = {}
+        self._swear_flushes: t.Dict[int, asyncio.Task] = {}
+        self.role_job_loop.start()
+        self.reactor_reconciliation.start()
 
     @commands.command()
     async def reputation(
@@ -757,7 +781,6 @@ class Moderation(commands.Cog):
                 await message.add_reaction(emoji)
             except discord.DiscordException:
                 pass
-            counter = -1
             reaction = find(
                 lambda reaction: getattr(reaction.emoji, "name", reaction.emoji
                                          ) == emoji,
@@ -766,18 +789,207 @@ class Moderation(commands.Cog):
             if not reaction:
                 await ctx.send("The rule has been successfully updated")
                 return
-            async for user in reaction.users():
-                counter += 1
+            status = await ctx.send(
+                "The rule has been successfully updated. I'm now applying it "
+                f"to the {reaction.count} users who already reacted")
+            job = await database.fetchrow(
+                "INSERT INTO public.role_jobs VALUES ($1, $2, $3, $4, $5, 0, 0,"
+                " $6, $7) ON CONFLICT (message_id, emoji) DO UPDATE SET "
+                "roleids=$5, last_user_id=0, applied=0, status_channel_id=$6,"
+                " status_message_id=$7 RETURNING *",
+                payload.message_id,
+                payload.channel_id,
+                payload.guild_id,
+                emoji,
+                [r.id for r in roles],
+                status.channel.id,
+                status.id,
+            )
+        running = self._role_jobs.pop((payload.message_id, emoji), None)
+        if running:
+            running.cancel()
+        self.start_role_job(job)
+
+    def start_role_job(self, job: t.Dict[str, t.Any]) -> None:
+        """Run a role assignment job in the background."""
+        key = (job["message_id"], job["emoji"])
+        if key not in self._role_jobs:
+            self._role_jobs[key] = asyncio.create_task(self.role_job(job))
+
+    @tasks.loop(minutes=5)
+    async def role_job_loop(self) -> None:
+        """Resume the role assignment jobs left unfinished."""
+        async with self.bot.pool.acquire() as database:
+            jobs = await database.fetch("SELECT * FROM public.role_jobs")
+        for job in jobs:
+            self.start_role_job(job)
+
+    @role_job_loop.before_loop
+    async def before_role_job_loop(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    async def role_job(self, job: t.Dict[str, t.Any]) -> None:
+        """Apply a rule to every user that already reacted, page by page."""
+        key = (job["message_id"], job["emoji"])
+        applied = job["applied"]
+        status = None
+        status_channel = self.bot.get_channel(job["status_channel_id"] or 0)
+        if status_channel:
+            status = status_channel.get_partial_message(
+                job["status_message_id"])
+        try:
+            guild = self.bot.get_guild(job["guild_id"])
+            channel = self.bot.get_channel(job["channel_id"])
+            try:
+                message = await channel.fetch_message(job["message_id"])
+            except (AttributeError, discord.NotFound, discord.Forbidden):
+                message = None
+            except discord.HTTPException:
+                return  # Probably transient, role_job_loop will retry
+            reaction = message and find(
+                lambda reaction: getattr(reaction.emoji, "name", reaction.emoji
+                                         ) == job["emoji"],
+                message.reactions,
+            )
+            roles = [
+                role for role in (guild.get_role(r) for r in job["roleids"])
+                if role
+            ] if guild else []
+            after = discord.Object(
+                job["last_user_id"]) if job["last_user_id"] else None
+            last_edit = monotonic()
+            while reaction and roles:
+                users = await reaction.users(limit=100, after=after).flatten()
+                if not users:
+                    break
+                applied += await self.role_page(guild, users, roles,
+                                                job["emoji"])
+                after = users[-1]
+                async with self.bot.pool.acquire() as database:
+                    await database.execute(
+                        "INSERT INTO public.role_reactors SELECT $1, $2, $3, "
+                        "UNNEST($4::bigint[]) ON CONFLICT DO NOTHING",
+                        job["message_id"],
+                        job["emoji"],
+                        job["guild_id"],
+                        [user.id for user in users if user != self.bot.user],
+                    )
+                    await database.execute(
+                        "UPDATE public.role_jobs SET last_user_id=$1, "
+                        "applied=$2 WHERE message_id=$3 AND emoji=$4",
+                        after.id,
+                        applied,
+                        job["message_id"],
+                        job["emoji"],
+                    )
+                if status and monotonic() - last_edit > 5:
+                    last_edit = monotonic()
+                    try:
+                        await status.edit(
+                            content=("The rule has been successfully updated. "
+                                     f"Applying it... ({applied}/"
+                                     f"{reaction.count} users done)"))
+                    except discord.HTTPException:
+                        status = None
+                if len(users) < 100:
+                    break
+            async with self.bot.pool.acquire() as database:
+                await database.execute(
+                    "DELETE FROM public.role_jobs WHERE message_id=$1 AND "
+                    "emoji=$2",
+                    job["message_id"],
+                    job["emoji"],
+                )
+            if status:
                 try:
-                    if isinstance(user, discord.Member):
-                        await user.add_roles(*roles)
-                except discord.DiscordException:
+                    await status.edit(
+                        content=("The rule has been successfully updated"
+                                 f" and applied to {applied} users"))
+                except discord.HTTPException:
                     pass
-            if counter:
-                await ctx.send("The rule has been successfully updated"
-                               f" and applied to {str(counter)} users")
+        finally:
+            if self._role_jobs.get(key) is asyncio.current_task():
+                del self._role_jobs[key]
+
+    async def role_page(
+        self,
+        guild: discord.Guild,
+        users: t.List[t.Union[discord.User, discord.Member]],
+        roles: t.List[discord.Role],
+        emoji: str,
+    ) -> int:
+        """Give the roles to a page of users.
+
+        discord.py waits out the 429s itself, so a chunk taking much longer
+        than a single request means that we got rate limited. The number of
+        members edited at once then shrinks, and grows back slowly otherwise.
+        """
+        users = [user for user in users if user != self.bot.user]
+        uncached = [
+            user.id for user in users if not isinstance(user, discord.Member)
+        ]
+        if uncached:
+            # A single gateway request instead of one API call per role
+            try:
+                members = {
+                    member.id: member
+                    for member in await guild.query_members(
+                        user_ids=uncached,
+                        limit=100,
+                        cache=False,
+                    )
+                }
+            except asyncio.TimeoutError:
+                pass  # give_roles falls back to adding the roles one by one
             else:
-                await ctx.send("The rule has been successfully updated")
+                users = [
+                    members[user.id] if user.id in members else user
+                    for user in users
+                    if isinstance(user, discord.Member) or user.id in members
+                ]
+        done = 0
+        while users:
+            chunk = users[:self.role_concurrency]
+            users = users[self.role_concurrency:]
+            start = monotonic()
+            results = await asyncio.gather(
+                *(self.give_roles(guild, user, roles, emoji) for user in chunk),
+                return_exceptions=True,
+            )
+            done += sum(result is True for result in results)
+            if monotonic() - start > self.role_chunk_time:
+                self.role_concurrency = max(1, self.role_concurrency // 2)
+            elif self.role_concurrency < 10:
+                self.role_concurrency += 1
+        return done
+
+    async def give_roles(
+        self,
+        guild: discord.Guild,
+        user: t.Union[discord.User, discord.Member],
+        roles: t.List[discord.Role],
+        emoji: str,
+    ) -> bool:
+        """Give roles to a member, with a single edit if possible.
+
+        Users that aren't members need one API call per role.
+        """
+        reason = f"Rule for emoji {emoji}"
+        try:
+            if isinstance(user, discord.Member):
+                missing = [role for role in roles if role not in user.roles]
+                if missing:
+                    await user.add_roles(*missing, reason=reason, atomic=False)
+            else:
+                for role in roles:
+                    await self.bot.http.add_role(guild.id,
+                                                 user.id,
+                                                 role.id,
+                                                 reason=reason)
+        except discord.HTTPException:
+            return False
+        return True
 
     @role.command(aliases=["list", "status"])
     async def info(self, ctx: commands.Context) -> None:
@@ -787,29 +999,38 @@ class Moderation(commands.Cog):
                 "SELECT * FROM public.roles WHERE guild_id=$1",
                 ctx.guild.id,
             )
-            deleted = 0
+            semaphore = asyncio.Semaphore(5)
+            exists = await asyncio.gather(*(self.rule_message_exists(
+                key["channel_id"],
+                key["message_id"],
+                semaphore,
+            ) for key in result))
             output = []
-            if result:
-                for key in result:
-                    try:
-                        channel = self.bot.get_channel(key["channel_id"])
-                        await channel.fetch_message(key["message_id"])
-                        output.append(dict(key))
-                        output[-1]["roleids"] = [
-                            ID for ID in output[-1]["roleids"]
-                            if ctx.guild.get_role(ID)
-                        ]
-                        await database.execute(
-                            "UPDATE public.roles SET roleids=$1 WHERE message_id=$2",
-                            output[-1]["roleids"],
-                            key["message_id"],
-                        )
-                    except Exception:
-                        deleted += 1
-                        await database.execute(
-                            "DELETE FROM public.roles WHERE message_id=$1",
-                            key["message_id"],
-                        )
+            stale: t.List[int] = []
+            for key, existing in zip(result, exists):
+                if existing:
+                    output.append(dict(key))
+                    output[-1]["roleids"] = [
+                        ID for ID in output[-1]["roleids"]
+                        if ctx.guild.get_role(ID)
+                    ]
+                else:
+                    stale.append(key["message_id"])
+            deleted = len(stale)
+            async with database.transaction():
+                await database.execute(
+                    "UPDATE public.roles SET roleids=ARRAY(SELECT role_id FROM "
+                    "UNNEST(roleids) AS role_id WHERE role_id=ANY($2::bigint[]"
+                    ")) WHERE guild_id=$1 AND NOT roleids <@ $2::bigint[]",
+                    ctx.guild.id,
+                    [role.id for role in ctx.guild.roles],
+                )
+                if stale:
+                    await database.execute(
+                        "DELETE FROM public.roles WHERE message_id="
+                        "ANY($1::bigint[])",
+                        stale,
+                    )
             if not output:
                 embed = discord.Embed(
                     title=f"Rules for guild {ctx.guild.name}",
@@ -863,6 +1084,33 @@ class Moderation(commands.Cog):
                 )
                 await pages.start(ctx)
 
+    async def rule_message_exists(
+        self,
+        channel_id: int,
+        message_id: int,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Check whether the message of a rule still exists.
+
+        Results are cached for a minute.
+        """
+        cached = self._rule_messages.get(message_id)
+        if cached and monotonic() - cached[0] < 60:
+            return cached[1]
+        channel = self.bot.get_channel(channel_id)
+        existing = False
+        if channel:
+            async with semaphore:
+                try:
+                    await channel.fetch_message(message_id)
+                    existing = True
+                except (discord.NotFound, discord.Forbidden):
+                    pass
+                except discord.HTTPException:
+                    return True  # Don't drop a rule on a transient error
+        self._rule_messages[message_id] = (monotonic(), existing)
+        return existing
+
     @role.command(aliases=["delete"])
     async def remove(self, ctx: commands.Context, number: int) -> None:
         """Remove the rule associated with the number specified."""
@@ -960,6 +1208,137 @@ class Moderation(commands.Cog):
                     "I thus removed the rule.")
                 return
 
+    @commands.command(aliases=["clear"])
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    @commands.bot_has_permissions(manage_messages=True,
+                                  read_message_history=True)
+    async def purge(
+        self,
+        ctx: commands.Context,
+        limit: int,
+        *,
+        filters: str = "",
+    ) -> None:
+        """Delete up to `limit` messages in this channel.
+
+        The messages can be filtered with :
+        `user:<user>` : only delete the messages of this user (can be repeated)
+        `contains:<text>` : only delete the messages containing this text
+        `regex:<pattern>` : only delete the messages matching this pattern
+        `bots` : only delete the messages sent by bots
+        `before:<message id>` / `after:<message id>` : search range
+        `dry` : only count the messages that would be deleted
+        Use quotes for values containing spaces.
+        """
+        if not 0 < limit <= 10000:
+            await ctx.send("The limit must be between 1 and 10000 messages")
+            return
+        users: t.Set[int] = set()
+        contains: t.List[str] = []
+        patterns: t.List[re.Pattern] = []
+        bots = dry = False
+        before: discord.abc.Snowflake = ctx.message
+        after: t.Optional[discord.abc.Snowflake] = None
+        try:
+            for raw_filter in shlex.split(filters):
+                key, _, value = raw_filter.partition(":")
+                key = key.lower()
+                if key == "bots":
+                    bots = True
+                elif key == "dry":
+                    dry = True
+                elif key == "user":
+                    user = await commands.UserConverter().convert(ctx, value)
+                    users.add(user.id)
+                elif key == "contains" and value:
+                    contains.append(value.lower())
+                elif key == "regex" and value:
+                    patterns.append(re.compile(value))
+                elif key in {"before", "after"} and value.isdigit():
+                    if key == "before":
+                        before = discord.Object(int(value))
+                    else:
+                        after = discord.Object(int(value))
+                else:
+                    raise commands.BadArgument(
+                        f"`{raw_filter}` isn't a valid filter")
+        except ValueError as error:
+            await ctx.send(f"I couldn't parse the filters : {error}")
+            return
+        except re.error as error:
+            await ctx.send(f"Invalid regex : {error}")
+            return
+        except commands.BadArgument as error:
+            await ctx.send(str(error))
+            return
+
+        def check(message: discord.Message) -> bool:
+            """Check whether a message must be deleted."""
+            if bots and not message.author.bot:
+                return False
+            if users and message.author.id not in users:
+                return False
+            content = message.content.lower()
+            if not all(text in content for text in contains):
+                return False
+            return all(
+                pattern.search(message.content) for pattern in patterns)
+
+        history = ctx.channel.history(
+            limit=limit,
+            before=before,
+            after=after,
+        ).filter(check)
+
+        if dry:
+            counter = 0
+            async for _ in history:
+                counter += 1
+            await ctx.send(f"{counter} messages would be deleted")
+            return
+
+        status = await ctx.send("Deleting messages...")
+        bulk_limit = datetime.utcnow() - timedelta(days=14, minutes=-1)
+        batch: t.List[discord.Message] = []
+        old: t.List[discord.Message] = []
+        deleted = 0
+
+        async def report() -> None:
+            """Edit the progress message."""
+            try:
+                await status.edit(content=f"Deleted {deleted} messages...")
+            except discord.HTTPException:
+                pass
+
+        async for message in history:
+            if message.created_at < bulk_limit:
+                old.append(message)
+                continue
+            batch.append(message)
+            if len(batch) == 100:
+                await ctx.channel.delete_messages(batch)
+                deleted += len(batch)
+                batch = []
+                await report()
+        if batch:
+            await ctx.channel.delete_messages(batch)
+            deleted += len(batch)
+            await report()
+        # Messages older than 14 days can't be bulk deleted
+        for i, message in enumerate(old):
+            try:
+                await message.delete()
+                deleted += 1
+            except discord.NotFound:
+                pass
+            if i % 20 == 19:
+                await report()
+        try:
+            await status.edit(content=f"Deleted {deleted} messages")
+        except discord.HTTPException:
+            await ctx.send(f"Deleted {deleted} messages")
+
     @commands.command()
     @commands.guild_only()
     @commands.bot_has_permissions(manage_messages=True)
@@ -1138,6 +1517,14 @@ class Moderation(commands.Cog):
                 payload.emoji.name,
             )
             if result:
+                await self._role_add.execute(
+                    "INSERT INTO public.role_reactors VALUES ($1, $2, $3, $4) "
+                    "ON CONFLICT DO NOTHING",
+                    payload.message_id,
+                    payload.emoji.name,
+                    payload.guild_id,
+                    payload.user_id,
+                )
                 guild = self.bot.get_guild(payload.guild_id)
                 roles = (guild.get_role(r) for r in result["roleids"])
                 try:
@@ -1164,12 +1551,16 @@ class Moderation(commands.Cog):
                 payload.emoji.name,
             )
             if result:
+                await self._role_remove.execute(
+                    "DELETE FROM public.role_reactors WHERE message_id=$1 AND "
+                    "emoji=$2 AND user_id=$3",
+                    payload.message_id,
+                    payload.emoji.name,
+                    payload.user_id,
+                )
                 guild = self.bot.get_guild(payload.guild_id)
-                try:
-                    member = guild.get_member(
-                        payload.user_id) or await guild.fetch_member(
-                            payload.user_id)
-                except discord.HTTPException:
+                member = await self.bot.resolve_member(guild, payload.user_id)
+                if not member:
                     return
                 roles = (guild.get_role(r) for r in result["roleids"])
                 try:
@@ -1187,29 +1578,81 @@ class Moderation(commands.Cog):
             self._role_save = await self.bot.pool.acquire()
             self._role_save_lock = asyncio.Lock()
         async with self._role_save_lock:
-            results = await self._role_save.fetch(
-                "SELECT * FROM public.roles WHERE guild_id=$1",
+            roleids = await self._role_save.fetchval(
+                "SELECT ARRAY_AGG(DISTINCT role_id) FROM public.role_reactors "
+                "INNER JOIN public.roles USING (message_id, emoji), "
+                "UNNEST(roles.roleids) AS role_id WHERE "
+                "role_reactors.guild_id=$1 AND role_reactors.user_id=$2",
                 member.guild.id,
+                member.id,
             )
-            for result in results:
-                channel = member.guild.get_channel(result["channel_id"])
-                if channel:
-                    message = await channel.fetch_message(result["message_id"])
-                    if message:
-                        for reaction in message.reactions:
-                            emoji = reaction.emoji
-                            if not isinstance(emoji, str):
-                                emoji = emoji.name
-                            if emoji == result["emoji"]:
-                                async for user in reaction.users():
-                                    if user == member:
-                                        roles = (member.guild.get_role(r)
-                                                 for r in result["roleids"])
-                                        await member.add_roles(
-                                            *(r for r in roles if r),
-                                            reason=f"Rule for emoji {emoji}",
-                                        )
-                                        break
+        if roleids:
+            roles = (member.guild.get_role(r) for r in roleids)
+            try:
+                await member.add_roles(
+                    *(r for r in roles if r),
+                    reason="Rules for the reactions of this member",
+                )
+            except discord.DiscordException:
+                pass
+
+    @tasks.loop(hours=6)
+    async def reactor_reconciliation(self) -> None:
+        """Correct the drift of the stored reactors from Discord."""
+        async with self.bot.pool.acquire() as database:
+            await database.execute(
+                "DELETE FROM public.role_reactors WHERE NOT EXISTS (SELECT 1 "
+                "FROM public.roles WHERE roles.message_id="
+                "role_reactors.message_id AND roles.emoji=role_reactors.emoji)"
+            )
+            rules = await database.fetch("SELECT * FROM public.roles")
+        for rule in rules:
+            try:
+                await self.reconcile_reactors(rule)
+            except discord.HTTPException:
+                pass
+
+    @reactor_reconciliation.before_loop
+    async def before_reactor_reconciliation(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    async def reconcile_reactors(self, rule: t.Dict[str, t.Any]) -> None:
+        """Replace the stored reactors of a rule with the actual ones."""
+        channel = self.bot.get_channel(rule["channel_id"])
+        if not channel:
+            return
+        message = await channel.fetch_message(rule["message_id"])
+        reaction = find(
+            lambda reaction: getattr(reaction.emoji, "name", reaction.emoji
+                                     ) == rule["emoji"],
+            message.reactions,
+        )
+        user_ids: t.List[int] = []
+        after = None
+        while reaction:
+            users = await reaction.users(limit=100, after=after).flatten()
+            user_ids += [user.id for user in users if user != self.bot.user]
+            if len(users) < 100:
+                break
+            after = users[-1]
+        async with self.bot.pool.acquire() as database:
+            async with database.transaction():
+                await database.execute(
+                    "DELETE FROM public.role_reactors WHERE message_id=$1 AND "
+                    "emoji=$2 AND NOT user_id=ANY($3::bigint[])",
+                    rule["message_id"],
+                    rule["emoji"],
+                    user_ids,
+                )
+                await database.execute(
+                    "INSERT INTO public.role_reactors SELECT $1, $2, $3, "
+                    "UNNEST($4::bigint[]) ON CONFLICT DO NOTHING",
+                    rule["message_id"],
+                    rule["emoji"],
+                    rule["guild_id"],
+                    user_ids,
+                )
 
     @commands.Cog.listener("on_message")
     async def no_swear_words(self, message: discord.Message) -> None:
@@ -1225,62 +1668,104 @@ class Moderation(commands.Cog):
             self._swear_conn = await self.bot.pool.acquire()
             self._swear_conn_lock = asyncio.Lock()
         async with self._swear_conn_lock:
-            try:
-                status = await self._swear_conn.fetchrow(
-                    "SELECT * FROM public.swear WHERE id=$1",
-                    message.guild.id,
-                )
-                if not status:
-                    return
-                owner = message.guild.owner or await message.guild.fetch_member(
-                    message.guild.owner_id)
-                if status["autoswear"]:
-                    for word in auto_swear_detection:
-                        if word in message.content.lower().split(" "):
-                            try:
-                                await message.delete()
-                                await message.channel.send(
-                                    f"Sorry {message.author.mention}. I "
-                                    "deleted your message because it contained"
-                                    " a forbidden word",
-                                    delete_after=5,
-                                )
-                            except discord.Forbidden:
-                                if status["notification"]:
-                                    await owner.send(
-                                        f"{message.author} used a swear word :"
-                                        f" `{word}`, but I lack the permission"
-                                        "s to delete the message. Please give "
-                                        "them back to me. You can use "
-                                        "the command `swear notification` to "
-                                        "turn this alert off.")
-                            return
-                if status["manual_on"]:
-                    for word in status["words"]:
-                        if word in message.content.lower().split(" "):
-                            try:
-                                await message.delete()
-                                await message.channel.send(
-                                    f"Sorry {message.author.mention}. I "
-                                    "deleted your message because it contained"
-                                    " a forbidden word",
-                                    delete_after=5,
-                                )
-                            except discord.Forbidden:
-                                if status["notification"]:
-                                    await owner.send(
-                                        f"{message.author} used a swear word :"
-                                        f" `{word}`, but I lack the permission"
-                                        "s to delete the message. Please give "
-                                        "them back to me. You can use the "
-                                        "command `swear notification` "
-                                        "to turn this alert off.")
-                            break
-            except discord.DiscordException:
-                pass
+            status = await self._swear_conn.fetchrow(
+                "SELECT * FROM public.swear WHERE id=$1",
+                message.guild.id,
+            )
+        if not status:
+            return
+        words = message.content.lower().split(" ")
+        forbidden = None
+        if status["autoswear"]:
+            forbidden = find(lambda word: word in auto_swear_detection, words)
+        if not forbidden and status["manual_on"]:
+            forbidden = find(lambda word: word in status["words"], words)
+        if not forbidden:
+            return
+        queue = self._swear_queues.get(message.channel.id)
+        if queue is None:
+            queue = self._swear_queues[message.channel.id] = []
+            self._swear_flushes[message.channel.id] = asyncio.create_task(
+                self.swear_flush(message.channel, status["notification"]))
+        queue.append((message, forbidden))
+
+    async def swear_flush(
+        self,
+        channel: discord.TextChannel,
+        notification: bool,
+    ) -> None:
+        """Bulk delete the messages with swear words sent in a short window.
+
+        A single notice is sent for the whole window.
+        """
+        try:
+            await asyncio.sleep(2)
+        finally:
+            self._swear_flushes.pop(channel.id, None)
+        queue = self._swear_queues.pop(channel.id, [])
+        messages = [message for message, _ in queue]
+        deleted: t.List[discord.Message] = []
+        try:
+            for i in range(0, len(messages), 100):
+                batch = messages[i:i + 100]
+                try:
+                    await channel.delete_messages(batch)
+                except discord.NotFound:
+                    # Some were already deleted, delete the others one by one
+                    for message in batch:
+                        try:
+                            await message.delete()
+                        except discord.NotFound:
+                            continue
+                        deleted.append(message)
+                else:
+                    deleted += batch
+        except discord.Forbidden:
+            if notification:
+                try:
+                    owner = channel.guild.owner or (
+                        await channel.guild.fetch_member(
+                            channel.guild.owner_id))
+                    used = capped_list(sorted({
+                        f"{message.author} (`{word}`)"
+                        for message, word in queue
+                    }))
+                    await owner.send(
+                        f"{used} used swear words in {channel.mention}, but "
+                        "I lack the permissions to delete the messages. Please"
+                        " give them back to me. You can use the command "
+                        "`swear notification` to turn this alert off.")
+                except discord.HTTPException:
+                    pass
+            return
+        except discord.HTTPException:
+            return
+        if not deleted:
+            return
+        mentions = capped_list(
+            dict.fromkeys(message.author.mention for message in deleted))
+        if len(deleted) > 1:
+            notice = (f"Sorry {mentions}. I deleted {len(deleted)} messages "
+                      "because they contained a forbidden word")
+        else:
+            notice = (f"Sorry {mentions}. I deleted your message because it "
+                      "contained a forbidden word")
+        try:
+            await channel.send(
+                notice,
+                delete_after=5,
+            )
+        except discord.HTTPException:
+            pass
 
     def cog_unload(self) -> None:
         """Cleanup the connections."""
+        self.role_job_loop.cancel()
+        self.reactor_reconciliation.cancel()
+        for job in self._role_jobs.values():
+            job.cancel()
+        for flush in self._swear_flushes.values():
+            flush.cancel()
         for name in ("_swear_conn", "_role_save", "_role_add", "_role_remove"):
             conn = getattr(self, name, None)
             if conn:
@@ -22,11 +22,23 @@ SOFTWARE.
 """
 
 import asyncio
+import csv
+import gzip
+import io
+import json
+import re
+import typing as t
+from collections import Counter, OrderedDict
+from heapq import nlargest
+from time import monotonic
 
+import asyncpg
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from pytz import utc
 
+from bin.keyset import KeysetSource, send_keyset_pages
+
 
 class TagName(commands.clean_content):
     """Converter for tag name."""
@@ -59,21 +71,221 @@ class TagName(commands.clean_content):
         return converted if not self.lower else lower
 
 
+class TagCache:
+    """LRU cache of resolved tags, bounded by the size of their content."""
+
+    def __init__(self, max_size: int = 4 * 1024 * 1024) -> None:
+        """Initialize the cache."""
+        self.max_size = max_size
+        self.size = 0
+        self._entries: t.Dict[t.Tuple[int, str], t.Tuple[int, str]] = (
+            OrderedDict())
+        self._keys: t.Dict[int, t.Set[t.Tuple[int, str]]] = {}
+
+    def get(self, location_id: int,
+            name: str) -> t.Optional[t.Tuple[int, str]]:
+        """Get the tag id and content of a tag."""
+        entry = self._entries.get((location_id, name))
+        if entry:
+            self._entries.move_to_end((location_id, name))
+        return entry
+
+    def put(self, location_id: int, name: str, tag_id: int,
+            content: str) -> None:
+        """Cache a tag, evicting the least recently used ones."""
+        size = len(content.encode())
+        if size > self.max_size:
+            return
+        self.invalidate(location_id, name)
+        self._entries[(location_id, name)] = (tag_id, content)
+        self._keys.setdefault(tag_id, set()).add((location_id, name))
+        self.size += size
+        while self.size > self.max_size:
+            key, _ = next(iter(self._entries.items()))
+            self.invalidate(*key)
+
+    def invalidate(self, location_id: int, name: str) -> None:
+        """Remove a name from the cache."""
+        entry = self._entries.pop((location_id, name), None)
+        if entry:
+            self.size -= len(entry[1].encode())
+            keys = self._keys[entry[0]]
+            keys.discard((location_id, name))
+            if not keys:
+                del self._keys[entry[0]]
+
+    def invalidate_tag(self, tag_id: int) -> None:
+        """Remove a tag and all its aliases from the cache."""
+        for key in tuple(self._keys.get(tag_id, ())):
+            self.invalidate(*key)
+
+
+def trigrams(text: str) -> t.FrozenSet[str]:
+    """Get the trigrams of a string, the same way pg_trgm does."""
+    result: t.Set[str] = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        word = f"  {word} "
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return frozenset(result)
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to the tag names of a location."""
+
+    def __init__(self) -> None:
+        """Initialize the index."""
+        self.ready = False
+        self.built_at = 0.0
+        self._names: t.Dict[str, t.FrozenSet[str]] = {}
+        self._index: t.Dict[str, t.Set[str]] = {}
+        self._removed: t.Set[str] = set()
+        # Names deleted while the index was being built
+
+    def build(self, names: t.Iterable[str]) -> None:
+        """Index the names fetched from the database, and mark us ready."""
+        for name in names:
+            if name not in self._removed:
+                self.add(name)
+        self._removed.clear()
+        self.ready = True
+        self.built_at = monotonic()
+
+    def add(self, name: str) -> None:
+        """Index a name."""
+        self._removed.discard(name)
+        if name in self._names:
+            return
+        self._names[name] = trigrams(name)
+        for trigram in self._names[name]:
+            self._index.setdefault(trigram, set()).add(name)
+
+    def remove(self, name: str) -> None:
+        """Remove a name from the index."""
+        if not self.ready:
+            self._removed.add(name)
+        for trigram in self._names.pop(name, ()):
+            names = self._index[trigram]
+            names.discard(name)
+            if not names:
+                del self._index[trigram]
+
+    def search(self,
+               query: str,
+               limit: int = 3,
+               threshold: float = 0.3) -> t.List[str]:
+        """Get the most similar names, like pg_trgm's `%` operator."""
+        query_trigrams = trigrams(query)
+        shared: t.Counter[str] = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._index.get(trigram, ()))
+        scores = ((count / (len(query_trigrams) + len(self._names[name]) -
+                            count), name) for name, count in shared.items())
+        return [
+            name for score, name in nlargest(limit, scores)
+            if score >= threshold
+        ]
+
+
 class Tags(commands.Cog):
     """Tag system."""
 
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize Tags."""
         self.bot = bot
-        self.tags_being_made = {}
+        self.cache = TagCache()
+        self.trigram_indexes: t.Dict[int, TrigramIndex] = {}
+        self.trigram_builds: t.Dict[int, asyncio.Task] = {}
+        self.trigram_ttl = 600
+        # Seconds after which an index is rebuilt, to see other processes' tags
+        self.tag_uses: t.Counter[int] = Counter()
+        self.alias_uses: t.Counter[t.Tuple[str, int]] = Counter()
+        # Use counts not yet written to the database
+        self.use_flush.start()
+        self.content_cleanup.start()
+
+    def cog_unload(self) -> None:
+        """Write the pending use counts."""
+        self.use_flush.cancel()
+        self.content_cleanup.cancel()
+        for build in self.trigram_builds.values():
+            build.cancel()
+        asyncio.create_task(self.flush_uses())
+
+    async def flush(self) -> None:
+        """Write the pending use counts before the bot closes."""
+        await self.flush_uses()
+
+    @tasks.loop(minutes=1)
+    async def use_flush(self) -> None:
+        """Periodically write the use counts."""
+        await self.flush_uses()
+
+    async def flush_uses(self) -> None:
+        """Write the pending use counts in a single statement."""
+        if not (self.tag_uses or self.alias_uses):
+            return
+        tag_uses, self.tag_uses = self.tag_uses, Counter()
+        alias_uses, self.alias_uses = self.alias_uses, Counter()
+        try:
+            async with self.bot.pool.acquire() as database:
+                await database.execute(
+                    "WITH tag AS (UPDATE public.tags SET use_count=use_count+"
+                    "uses.count FROM UNNEST($1::integer[], $2::integer[]) AS "
+                    "uses(id, count) WHERE tags.id=uses.id) UPDATE "
+                    "public.tag_lookup SET use_count=use_count+uses.count FROM"
+                    " UNNEST($3::text[], $4::bigint[], $5::integer[]) AS "
+                    "uses(name, location_id, count) WHERE tag_lookup.name="
+                    "uses.name AND tag_lookup.location_id=uses.location_id",
+                    list(tag_uses),
+                    list(tag_uses.values()),
+                    [name for name, _ in alias_uses],
+                    [location_id for _, location_id in alias_uses],
+                    list(alias_uses.values()),
+                )
+        except Exception as error:
+            # Raising would stop use_flush for good
+            self.tag_uses.update(tag_uses)
+            self.alias_uses.update(alias_uses)
+            await self.bot.report_error(
+                "Couldn't write the tag use counts", error)
+
+    @use_flush.before_loop
+    async def before_use_flush(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=1)
+    async def content_cleanup(self) -> None:
+        """Delete the contents no tag uses anymore.
 
-    def check_tag(self, name: str, guild: int, author: int) -> bool:
-        """Check that the tag isn't being made."""
-        tag_author = self.tags_being_made.get((guild, name))
-        return not tag_author or tag_author == author
+        Contents locked by a tag being created or edited are skipped.
+        """
+        try:
+            async with self.bot.pool.acquire() as database:
+                await database.execute(
+                    "DELETE FROM public.tag_contents WHERE hash IN (SELECT "
+                    "hash FROM public.tag_contents WHERE NOT EXISTS (SELECT 1"
+                    " FROM public.tags WHERE content_hash=hash) FOR UPDATE "
+                    "SKIP LOCKED)")
+        except Exception as error:
+            # Raising would stop content_cleanup for good
+            await self.bot.report_error(
+                "Couldn't clean the tag contents up", error)
+
+    @content_cleanup.before_loop
+    async def before_content_cleanup(self) -> None:
+        """Wait for the bot to be ready."""
+        await self.bot.wait_until_ready()
 
     async def search_tag(self, name: str, location_id: int, database) -> str:
         """Search for a tag."""
+        index = self.trigram_indexes.get(location_id)
+        if index and index.ready and (
+                monotonic() - index.built_at < self.trigram_ttl):
+            return "\n".join(index.search(name))
+        if location_id not in self.trigram_builds:
+            self.trigram_builds[location_id] = asyncio.create_task(
+                self.build_trigram_index(location_id))
         rows = await database.fetch(
             "SELECT name FROM public.tag_lookup WHERE location_id=$1 AND name "
             "% $2 ORDER BY similarity(name, $2) DESC LIMIT 3",
@@ -82,6 +294,41 @@ class Tags(commands.Cog):
         )
         return "\n".join([row["name"] for row in rows])
 
+    async def build_trigram_index(self, location_id: int) -> None:
+        """Build the trigram index of a location, dropping the expired ones."""
+        now = monotonic()
+        for key, old in tuple(self.trigram_indexes.items()):
+            if old.ready and now - old.built_at >= self.trigram_ttl:
+                del self.trigram_indexes[key]
+        index = self.trigram_indexes[location_id] = TrigramIndex()
+        try:
+            async with self.bot.pool.acquire() as database:
+                rows = await database.fetch(
+                    "SELECT name FROM public.tag_lookup WHERE location_id=$1",
+                    location_id,
+                )
+        except Exception as error:
+            if self.trigram_indexes.get(location_id) is index:
+                del self.trigram_indexes[location_id]
+            await self.bot.report_error(
+                "Couldn't build a trigram index", error)
+            return
+        finally:
+            self.trigram_builds.pop(location_id, None)
+        index.build(row["name"] for row in rows)
+
+    def index_add(self, location_id: int, name: str) -> None:
+        """Add a name to the trigram index of its location."""
+        index = self.trigram_indexes.get(location_id)
+        if index:
+            index.add(name)
+
+    def index_remove(self, location_id: int, name: str) -> None:
+        """Remove a name from the trigram index of its location."""
+        index = self.trigram_indexes.get(location_id)
+        if index:
+            index.remove(name)
+
     @commands.group(invoke_without_command=True, aliases=["t"])
     @commands.guild_only()
     async def tag(
@@ -92,38 +339,34 @@ class Tags(commands.Cog):
     ) -> None:
         """Tag some text to retrieve it later."""
         location_id = self.bot.get_id(ctx)
-        async with self.bot.pool.acquire() as database:
-            row = await database.fetchrow(
-                "SELECT * FROM public.tag_lookup WHERE name=$1 AND location_id=$2",
-                name,
-                location_id,
-            )
-            if not row:
-                rows = await self.search_tag(name, location_id, database)
-                if rows:
-                    await ctx.send(f"Tag not found. Did you mean :\n{rows}")
+        cached = self.cache.get(location_id, name)
+        if not cached:
+            async with self.bot.pool.acquire() as database:
+                row = await database.fetchrow(
+                    "SELECT tag_id, content FROM public.tag_lookup LEFT JOIN "
+                    "public.tags ON tags.id=tag_lookup.tag_id LEFT JOIN "
+                    "public.tag_contents ON hash=content_hash WHERE "
+                    "tag_lookup.name=$1 AND tag_lookup.location_id=$2",
+                    name,
+                    location_id,
+                )
+                if not row:
+                    rows = await self.search_tag(name, location_id, database)
+                    if rows:
+                        await ctx.send(
+                            f"Tag not found. Did you mean :\n{rows}")
+                        return
+                    await ctx.send("Tag not found")
                     return
-                await ctx.send("Tag not found")
-                return
-            tag = await database.fetchrow(
-                "SELECT * FROM public.tags WHERE id=$1",
-                row["tag_id"],
-            )
-            if not tag:
-                await ctx.send("Tag not found")
-                await self.delete_aliases(row["tag_id"], database)
-                return
-            await database.execute(
-                "UPDATE public.tags SET use_count=use_count+1 WHERE id=$1",
-                tag["id"],
-            )
-            await database.execute(
-                "UPDATE public.tag_lookup SET use_count=use_count+1 WHERE "
-                "name=$1 AND location_id=$2",
-                name,
-                location_id,
-            )
-        await ctx.send(tag["content"])
+                if row["content"] is None:
+                    await ctx.send("Tag not found")
+                    await self.delete_aliases(row["tag_id"], database)
+                    return
+            cached = (row["tag_id"], row["content"])
+            self.cache.put(location_id, name, *cached)
+        self.tag_uses[cached[0]] += 1
+        self.alias_uses[(name, location_id)] += 1
+        await ctx.send(cached[1])
 
     async def create_tag(
         self,
@@ -131,45 +374,45 @@ class Tags(commands.Cog):
         name: str,
         content: str,
         location_id: int = None,
-    ) -> None:
-        """Create a tag."""
+    ) -> bool:
+        """Create a tag.
+
+        The unique constraints detect existing tags, even across processes.
+        """
         if location_id is None:
             location_id = self.bot.get_id(ctx)
+        self.cache.invalidate(location_id, name)
         async with self.bot.pool.acquire() as database:
-            row = await database.fetchrow(
-                "SELECT * FROM public.tag_lookup WHERE name=$1 AND location_id=$2",
-                name,
-                location_id,
-            )
-            if row:
+            try:
+                await database.execute(
+                    "WITH content AS (INSERT INTO public.tag_contents VALUES "
+                    "(sha256(convert_to($4, 'UTF8')), $4) ON CONFLICT (hash) "
+                    "DO UPDATE SET hash=EXCLUDED.hash RETURNING hash), tag AS "
+                    "(INSERT INTO public.tags (location_id, owner_id, name, "
+                    "content_hash) SELECT $1, $2, $3, hash FROM content "
+                    "RETURNING id) INSERT INTO public.tag_lookup (name, "
+                    "location_id, owner_id, tag_id) SELECT $3, $1, $2, id "
+                    "FROM tag",
+                    location_id,
+                    ctx.author.id,
+                    name,
+                    content,
+                )
+            except asyncpg.UniqueViolationError:
                 await ctx.send("A tag already exists with that name")
-                return
-            await database.execute(
-                "INSERT INTO public.tags VALUES ($1, $2, $3, $4)",
-                location_id,
-                ctx.author.id,
-                name,
-                content,
-            )
-            tag = await database.fetchrow(
-                "SELECT * FROM public.tags WHERE name=$1 AND location_id=$2",
-                name,
-                location_id,
-            )
-            await database.execute(
-                "INSERT INTO public.tag_lookup VALUES ($1, $2, $3, $4)",
-                name,
-                location_id,
-                ctx.author.id,
-                tag["id"],
-            )
+                return False
+        self.index_add(location_id, name)
+        return True
 
     async def delete_aliases(self, tag_id: int, database) -> None:
         """Delete all aliases of a tag."""
-        await database.execute(
-            "DELETE FROM public.tag_lookup WHERE tag_id=$1",
-            tag_id,
-        )
+        self.cache.invalidate_tag(tag_id)
+        for row in await database.fetch(
+                "DELETE FROM public.tag_lookup WHERE tag_id=$1 RETURNING "
+                "location_id, name",
+                tag_id,
+        ):
+            self.index_remove(row["location_id"], row["name"])
 
     @tag.command(name="alias")
     @commands.guild_only()
@@ -207,6 +450,7 @@ class Tags(commands.Cog):
             if existing_alias:
                 await ctx.send(f"An alias named {alias} already exists")
                 return
+            self.cache.invalidate(location_id, alias)
             await database.execute(
                 "INSERT INTO public.tag_lookup VALUES ($1, $2, $3, $4)",
                 alias,
@@ -214,6 +458,7 @@ class Tags(commands.Cog):
                 ctx.author.id,
                 row["tag_id"],
             )
+            self.index_add(location_id, alias)
             await ctx.send(
                 f"Alias {alias} for tag {tag['name']} created successfully")
 
@@ -236,12 +481,7 @@ class Tags(commands.Cog):
             if not alias:
                 await ctx.send(f"No tag or alias named {name} found")
                 return
-            try:
-                owner = ctx.guild.get_member(
-                    alias["owner_id"]) or await ctx.guild.fetch_member(
-                        alias["owner_id"])
-            except discord.NotFound:
-                owner = None
+            owner = await self.bot.resolve_member(ctx.guild, alias["owner_id"])
 
             if owner:
                 await ctx.send(
@@ -257,13 +497,9 @@ class Tags(commands.Cog):
                 await self.delete_aliases(alias["tag_id"], database)
                 return
 
-            try:
-                owner = ctx.guild.get_member(
-                    tag["owner_id"]) or await ctx.guild.fetch_member(
-                        tag["owner_id"])
-            except discord.NotFound:
-                owner = None
+            owner = await self.bot.resolve_member(ctx.guild, tag["owner_id"])
 
+            self.cache.invalidate_tag(tag["id"])
             await database.execute(
                 "UPDATE public.tag_lookup SET owner_id=$1 WHERE name=$2 AND "
                 "location_id=$3",
@@ -294,14 +530,8 @@ class Tags(commands.Cog):
             content: str,
     ) -> None:
         """Create a tag with the given name and content."""
-        location_id = self.bot.get_id(ctx)
-        if not self.check_tag(name, location_id, ctx.author.id):
-            await ctx.send("Someone is already making a tag with this name")
-            return
-        self.tags_being_made[(location_id, name)] = ctx.author.id
-        await self.create_tag(ctx, name, content)
-        await ctx.send(f"Tag {name} created successfully")
-        del self.tags_being_made[(location_id, name)]
+        if await self.create_tag(ctx, name, content):
+            await ctx.send(f"Tag {name} created successfully")
 
     @tag.command(name="delete", aliases=["remove"])
     @commands.guild_only()
@@ -356,12 +586,49 @@ class Tags(commands.Cog):
                 )
                 await self.delete_aliases(tag["id"], database)
             else:
+                self.cache.invalidate(location_id, alias["name"])
                 await ctx.send(f"Alias {tag} deleted successfully")
                 await database.execute(
                     "DELETE FROM public.tag_lookup WHERE location_id=$1 AND name=$2",
                     location_id,
                     alias["name"],
                 )
+                self.index_remove(location_id, alias["name"])
+
+    @tag.command(name="edit")
+    @commands.guild_only()
+    async def tag_edit(
+            self,
+            ctx: commands.Context,
+            name: TagName(lower=True),
+            *,
+            content: commands.clean_content,
+    ) -> None:
+        """Edit the content of a tag you own.
+
+        Other copies of the tag, like global ones, aren't affected.
+        """
+        location_id = self.bot.get_id(ctx)
+        async with self.bot.pool.acquire() as database:
+            tag_id = await database.fetchval(
+                "WITH content AS (INSERT INTO public.tag_contents VALUES "
+                "(sha256(convert_to($3, 'UTF8')), $3) ON CONFLICT (hash) DO "
+                "UPDATE SET hash=EXCLUDED.hash RETURNING hash) UPDATE "
+                "public.tags SET content_hash=content.hash FROM content WHERE "
+                "tags.id=(SELECT tag_id FROM public.tag_lookup WHERE name=$2 "
+                "AND location_id=$1) AND owner_id=$4 RETURNING tags.id",
+                location_id,
+                name,
+                content,
+                ctx.author.id,
+            )
+        if tag_id is None:
+            await ctx.send(
+                f"No tag named {name} found. Are you sure that it exists and "
+                "that you own it ?")
+            return
+        self.cache.invalidate_tag(tag_id)
+        await ctx.send(f"Tag {name} edited successfully")
 
     @tag.command(name="info")
     @commands.guild_only()
@@ -373,54 +640,67 @@ class Tags(commands.Cog):
     ) -> None:
         """Retrieve information about a tag."""
         location_id = self.bot.get_id(ctx)
+        cached = self.cache.get(location_id, name)
         async with self.bot.pool.acquire() as database:
-            row = await database.fetchrow(
-                "SELECT * FROM public.tag_lookup WHERE name=$1 AND location_id=$2",
-                name,
-                location_id,
-            )
-            if not row:
-                await ctx.send(f"No tag named {name} found")
-                return
+            if cached:
+                tag_id = cached[0]
+            else:
+                tag_id = await database.fetchval(
+                    "SELECT tag_id FROM public.tag_lookup WHERE name=$1 AND "
+                    "location_id=$2",
+                    name,
+                    location_id,
+                )
+                if tag_id is None:
+                    await ctx.send(f"No tag named {name} found")
+                    return
             tag = await database.fetchrow(
-                "SELECT * FROM public.tags WHERE id=$1",
-                row["tag_id"],
+                "SELECT tags.*, content FROM public.tags INNER JOIN "
+                "public.tag_contents ON hash=content_hash WHERE id=$1",
+                tag_id,
             )
             if not tag:
                 await ctx.send(f"No tag named {name} found")
-                await self.delete_aliases(row["tag_id"], database)
+                await self.delete_aliases(tag_id, database)
                 return
 
             aliases = await database.fetch(
                 "SELECT * FROM public.tag_lookup WHERE tag_id=$1",
-                row["tag_id"],
+                tag_id,
             )
+        row = discord.utils.find(
+            lambda alias: (alias["name"], alias["location_id"]) ==
+            (name, location_id),
+            aliases,
+        )
+        if not row:
+            self.cache.invalidate(location_id, name)
+            await ctx.send(f"No tag named {name} found")
+            return
+        self.cache.put(location_id, name, tag_id, tag["content"])
 
         embed = discord.Embed(
             title=f"Informations about tag {tag['name']}",
             colour=discord.Colour.blue(),
         )
-        try:
-            owner = ctx.guild.get_member(
-                tag["owner_id"]) or await ctx.guild.fetch_member(
-                    tag["owner_id"])
-        except discord.NotFound:
-            owner = None
+        members = await self.bot.resolve_members(
+            ctx.guild,
+            [tag["owner_id"]] + [alias["owner_id"] for alias in aliases],
+        )
+        owner = members[tag["owner_id"]]
         embed.add_field(
             name="Owner :",
             value=f"{owner.mention if owner else 'Unclaimed'}",
         )
-        embed.add_field(name="Usages :", value=tag["use_count"])
+        embed.add_field(
+            name="Usages :",
+            value=tag["use_count"] + self.tag_uses[tag["id"]],
+        )
         if len(aliases) > 1:
             alias_content = []
             for alias in aliases:
                 if alias["name"] != tag["name"]:
-                    try:
-                        owner = ctx.guild.get_member(
-                            alias["owner_id"]) or await ctx.guild.fetch_member(
-                                alias["owner_id"])
-                    except discord.NotFound:
-                        owner = None
+                    owner = members[alias["owner_id"]]
                     alias_content.append(
                         f"{alias['name']} : "
                         f"{owner.mention if owner else 'Unclaimed'}")
@@ -462,12 +742,6 @@ class Tags(commands.Cog):
         finally:
             ctx.message = original
 
-        if not self.check_tag(name, location_id, ctx.author.id):
-            await ctx.send(
-                "Someone is already making a tag with that name. Try again later."
-            )
-            return
-
         async with self.bot.pool.acquire() as database:
             row = await database.fetchrow(
                 "SELECT * FROM public.tag_lookup WHERE name=$1 AND location_id=$2",
@@ -480,29 +754,24 @@ class Tags(commands.Cog):
                 )
                 return
 
-        self.tags_being_made[(location_id, name)] = ctx.author.id
-
         await ctx.send(
             f"Okay, the tag's name is {name}. What will be its content?\nYou "
             f"can type `{ctx.prefix}abort` to escape this process")
         try:
             msg = await self.bot.wait_for("message", check=check, timeout=300)
         except asyncio.TimeoutError:
-            del self.tags_being_made[(location_id, name)]
             await ctx.send("You took too long. I'm canelling this")
             return
 
         content = msg.content
         if content == f"{ctx.prefix}abort":
-            del self.tags_being_made[(location_id, name)]
             await ctx.send("Aborted")
             return
         clean_content = await commands.clean_content().convert(ctx, content)
         if msg.attachments:
             clean_content += f"\n{msg.attachments[0].url}"
-        await ctx.send(f"Tag {name} created successfully")
-        await self.create_tag(ctx, name, clean_content)
-        del self.tags_being_made[(location_id, name)]
+        if await self.create_tag(ctx, name, clean_content):
+            await ctx.send(f"Tag {name} created successfully")
 
     @tag.command(name="purge")
     @commands.has_guild_permissions(manage_messages=True)
@@ -513,23 +782,30 @@ class Tags(commands.Cog):
     ) -> None:
         """Delete all local tags made by a user."""
         location_id = self.bot.get_id(ctx)
-        counter = 0
         async with self.bot.pool.acquire() as database:
-            for tag in await database.fetch(
-                    "SELECT * FROM public.tags WHERE owner_id=$1 AND location_id=$2",
-                    member.id,
-                    location_id,
-            ):
-                counter += 1
-                await database.execute(
-                    "DELETE FROM public.tags WHERE id=$1",
-                    tag["id"],
-                )
-                await self.delete_aliases(tag["id"], database)
+            rows = await database.fetch(
+                "WITH tag AS (DELETE FROM public.tags WHERE owner_id=$1 AND "
+                "location_id=$2 RETURNING id), alias AS (DELETE FROM "
+                "public.tag_lookup WHERE tag_id IN (SELECT id FROM tag) "
+                "RETURNING tag_id, location_id, name) SELECT tag.id, "
+                "ARRAY(SELECT name FROM alias WHERE alias.tag_id=tag.id AND "
+                "alias.location_id=$2) AS names FROM tag",
+                member.id,
+                location_id,
+            )
+        counter = len(rows)
+        aliases = 0
+        for row in rows:
+            self.cache.invalidate_tag(row["id"])
+            for name in row["names"]:
+                self.index_remove(location_id, name)
+            aliases += max(len(row["names"]) - 1, 0)
+        alias_info = (f" along with {aliases} "
+                      f"alias{'es' if aliases > 1 else ''}" if aliases else "")
         await ctx.send(
             f"{counter} tag{'s' if counter > 1 else ''} owned by "
             f"{member.mention} {'were' if counter > 1 else 'was'} deleted"
-            if counter else f"{member} hasn't created any tag")
+            f"{alias_info}" if counter else f"{member} hasn't created any tag")
 
     @tag.command(name="search")
     @commands.guild_only()
@@ -580,6 +856,7 @@ class Tags(commands.Cog):
                 ctx.author.id,
                 location_id,
             )
+            self.cache.invalidate_tag(alias["tag_id"])
             await database.execute(
                 "UPDATE public.tag_lookup SET owner_id=$1 WHERE name=$2 AND "
                 "location_id=$3",
@@ -599,6 +876,278 @@ class Tags(commands.Cog):
                 return
             await ctx.send("Alias successfully transferred")
 
+    @tag.command(name="list")
+    @commands.guild_only()
+    async def tag_list(
+        self,
+        ctx: commands.Context,
+        *,
+        member: discord.Member = None,
+    ) -> None:
+        """List the tags and aliases of this server, or of a member."""
+        location_id = self.bot.get_id(ctx)
+        if member:
+            source = KeysetSource(
+                self.bot.pool,
+                "SELECT name FROM public.tag_lookup WHERE location_id=$1 AND "
+                "owner_id=$2 AND name>$3 ORDER BY name LIMIT $4",
+                (location_id, member.id),
+                ("", ),
+                lambda row: (row["name"], ),
+                f"Tags of {member.display_name}",
+                lambda i, row: f"{i}. {row['name']}",
+            )
+        else:
+            source = KeysetSource(
+                self.bot.pool,
+                "SELECT name FROM public.tag_lookup WHERE location_id=$1 AND "
+                "name>$2 ORDER BY name LIMIT $3",
+                (location_id, ),
+                ("", ),
+                lambda row: (row["name"], ),
+                f"Tags of {ctx.guild.name}",
+                lambda i, row: f"{i}. {row['name']}",
+            )
+        await send_keyset_pages(ctx, source, "There are no tags to show")
+
+    @tag.command(name="top")
+    @commands.guild_only()
+    async def tag_top(self, ctx: commands.Context) -> None:
+        """List the most used tags of this server."""
+        source = KeysetSource(
+            self.bot.pool,
+            "SELECT id, name, use_count FROM public.tags WHERE location_id=$1"
+            " AND (use_count, id) < ($2, $3) ORDER BY use_count DESC, id DESC"
+            " LIMIT $4",
+            (self.bot.get_id(ctx), ),
+            (2**31 - 1, 2**31 - 1),
+            lambda row: (row["use_count"], row["id"]),
+            f"Most used tags of {ctx.guild.name}",
+            lambda i, row: f"{i}. {row['name']} ({row['use_count']} uses)",
+        )
+        await send_keyset_pages(ctx, source, "There are no tags to show")
+
+    @tag.command(name="grep")
+    @commands.guild_only()
+    async def tag_grep(self, ctx: commands.Context, *, words: str) -> None:
+        """Search for the tags of this server containing some words."""
+        await send_keyset_pages(
+            ctx,
+            self.grep_source(
+                self.bot.get_id(ctx),
+                words,
+                f"Tags containing {words}",
+            ),
+            "There are no tags to show",
+        )
+
+    def grep_source(self, location_id: int, words: str,
+                    title: str) -> KeysetSource:
+        """Create the source for a full-text search, ranked by relevance."""
+        return KeysetSource(
+            self.bot.pool,
+            "SELECT tags.id, tags.name, ts_rank(search, query) AS rank FROM "
+            "public.tags INNER JOIN public.tag_contents ON hash=content_hash,"
+            " websearch_to_tsquery('english', $2) AS query WHERE "
+            "location_id=$1 AND search @@ query AND (ts_rank(search, query),"
+            " tags.id) < ($3::real, $4) ORDER BY rank DESC, tags.id DESC "
+            "LIMIT $5",
+            (location_id, words),
+            (float("inf"), 2**31 - 1),
+            lambda row: (row["rank"], row["id"]),
+            discord.utils.escape_mentions(title)[:256],
+            lambda i, row: f"{i}. {row['name']}",
+        )
+
+    @tag.command(name="export")
+    @commands.guild_only()
+    @commands.cooldown(1, 60, commands.BucketType.guild)
+    async def tag_export(
+        self,
+        ctx: commands.Context,
+        fmt: str = "jsonl",
+    ) -> None:
+        """Export this server's tags and aliases as a JSONL or CSV file.
+
+        Files too large for Discord are gzipped.
+        """
+        fmt = fmt.lower()
+        if fmt not in {"jsonl", "csv"}:
+            await ctx.send("The format must be either `jsonl` or `csv`")
+            return
+        location_id = self.bot.get_id(ctx)
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if fmt == "csv":
+            writer.writerow(("name", "content", "aliases"))
+        counter = 0
+        async with self.bot.pool.acquire() as database:
+            async with database.transaction():
+                async for row in database.cursor(
+                        "SELECT tags.name, content, ARRAY(SELECT "
+                        "tag_lookup.name FROM public.tag_lookup WHERE "
+                        "tag_lookup.tag_id=tags.id AND tag_lookup.name<>"
+                        "tags.name) AS aliases FROM public.tags INNER JOIN "
+                        "public.tag_contents ON hash=content_hash WHERE "
+                        "location_id=$1 ORDER BY tags.id",
+                        location_id,
+                        prefetch=500,
+                ):
+                    counter += 1
+                    if fmt == "csv":
+                        writer.writerow((row["name"], row["content"],
+                                         "\n".join(row["aliases"])))
+                    else:
+                        output.write(json.dumps(dict(row)) + "\n")
+        if not counter:
+            await ctx.send("There are no tags to export in this server")
+            return
+        data = output.getvalue().encode()
+        filename = f"tags.{fmt}"
+        if len(data) > ctx.guild.filesize_limit:
+            data = gzip.compress(data)
+            filename += ".gz"
+        if len(data) > ctx.guild.filesize_limit:
+            await ctx.send(
+                f"The export of {counter} tags is too large to be sent, even "
+                "compressed")
+            return
+        try:
+            await ctx.send(
+                f"{counter} tag{'s' if counter > 1 else ''} exported",
+                file=discord.File(io.BytesIO(data), filename=filename),
+            )
+        except discord.HTTPException as error:
+            await ctx.send(f"I couldn't send the export : {error.text}")
+
+    @tag.command(name="import")
+    @commands.guild_only()
+    @commands.has_guild_permissions(manage_guild=True)
+    @commands.cooldown(1, 60, commands.BucketType.guild)
+    async def tag_import(self, ctx: commands.Context) -> None:
+        """Import tags from a JSONL or CSV file attached to the message.
+
+        Each tag needs a `name` and a `content`, and can have a list of
+        `aliases`. In CSV files, aliases are separated by line breaks.
+        The file can be gzipped, like large exports are.
+        You become the owner of the imported tags.
+        """
+        if not ctx.message.attachments:
+            await ctx.send("Please attach a JSONL or CSV file to the message")
+            return
+        attachment = ctx.message.attachments[0]
+        filename = attachment.filename.lower()
+        try:
+            raw_bytes = await attachment.read()
+            if filename.endswith(".gz"):
+                raw_bytes = gzip.decompress(raw_bytes)
+                filename = filename[:-3]
+            raw = raw_bytes.decode()
+            if filename.endswith(".csv"):
+                entries = [{
+                    "name": row.get("name"),
+                    "content": row.get("content"),
+                    "aliases": (row.get("aliases") or "").splitlines(),
+                } for row in csv.DictReader(io.StringIO(raw))]
+            else:
+                entries = [
+                    json.loads(line) for line in raw.splitlines()
+                    if line.strip()
+                ]
+        except (UnicodeDecodeError, csv.Error, ValueError, OSError,
+                EOFError) as error:
+            await ctx.send(f"I couldn't read this file : {error}")
+            return
+
+        converter = TagName(lower=True)
+        names: t.Set[str] = set()
+        records: t.List[t.Tuple[str, str, t.List[str]]] = []
+        conflicts: t.List[str] = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                conflicts.append("?")
+                continue
+            raw_aliases = entry.get("aliases") or []
+            if not (isinstance(entry.get("name"), str)
+                    and isinstance(entry.get("content"), str)
+                    and isinstance(raw_aliases, list)
+                    and all(isinstance(alias, str) for alias in raw_aliases)):
+                conflicts.append(str(entry.get("name", "?")))
+                continue
+            try:
+                name = await converter.convert(ctx, entry["name"])
+                content = entry["content"]
+                aliases = [
+                    await converter.convert(ctx, alias)
+                    for alias in raw_aliases
+                ]
+            except commands.BadArgument:
+                conflicts.append(entry["name"])
+                continue
+            if not content or len(content) > 2000 or name in names:
+                conflicts.append(name)
+                continue
+            names.add(name)
+            records.append((name, content, aliases))
+        for i, (name, content, aliases) in enumerate(records):
+            kept = []
+            for alias in aliases:
+                if alias in names:
+                    conflicts.append(alias)
+                else:
+                    names.add(alias)
+                    kept.append(alias)
+            records[i] = (name, content, kept)
+
+        location_id = self.bot.get_id(ctx)
+        async with self.bot.pool.acquire() as database:
+            async with database.transaction():
+                await database.execute(
+                    "CREATE TEMPORARY TABLE tag_import (name text, content "
+                    "text, aliases text[]) ON COMMIT DROP")
+                await database.copy_records_to_table(
+                    "tag_import",
+                    records=records,
+                    columns=("name", "content", "aliases"),
+                )
+                rows = await database.fetch(
+                    "WITH content AS (INSERT INTO public.tag_contents SELECT "
+                    "DISTINCT sha256(convert_to(content, 'UTF8')), content "
+                    "FROM tag_import ON CONFLICT (hash) DO UPDATE SET "
+                    "hash=EXCLUDED.hash), tag AS (INSERT INTO public.tags "
+                    "(location_id, owner_id, name, content_hash) SELECT $1, "
+                    "$2, name, sha256(convert_to(content, 'UTF8')) FROM "
+                    "tag_import WHERE NOT EXISTS (SELECT 1 FROM "
+                    "public.tag_lookup WHERE tag_lookup.location_id=$1 AND "
+                    "tag_lookup.name=tag_import.name) ON CONFLICT DO NOTHING "
+                    "RETURNING id, name) INSERT INTO public.tag_lookup (name, "
+                    "location_id, owner_id, tag_id) SELECT tag.name, $1, $2, "
+                    "tag.id FROM tag UNION ALL SELECT alias, $1, $2, tag.id "
+                    "FROM tag INNER JOIN tag_import USING (name), "
+                    "UNNEST(tag_import.aliases) AS alias ON CONFLICT DO "
+                    "NOTHING RETURNING name",
+                    location_id,
+                    ctx.author.id,
+                )
+        created = {row["name"] for row in rows}
+        imported = sum(name in created for name, _, _ in records)
+        aliases = len(created) - imported
+        conflicts += [
+            name for record in records for name in (record[0], *record[2])
+            if name not in created
+        ]
+        self.trigram_indexes.pop(location_id, None)
+        message = (f"{imported} tag{'s' if imported != 1 else ''} and "
+                   f"{aliases} alias{'es' if aliases != 1 else ''} imported")
+        if conflicts:
+            shown = ", ".join(conflicts[:20])
+            more = f" and {len(conflicts) - 20} more" if len(
+                conflicts) > 20 else ""
+            message += (f". {len(conflicts)} names were skipped because they "
+                        "were invalid or already existed : "
+                        f"{discord.utils.escape_markdown(shown)}{more}")
+        await ctx.send(message[:2000])
+
     @tag.group(name="global", invoke_without_command=True)
     @commands.guild_only()
     async def tag_global(self, ctx: commands.Context) -> None:
@@ -629,7 +1178,9 @@ class Tags(commands.Cog):
                     "sure that it exists and that you own it ?")
                 return
             tag = await database.fetchrow(
-                "SELECT * FROM public.tags WHERE id=$1 AND owner_id=$2",
+                "SELECT tags.*, content FROM public.tags INNER JOIN "
+                "public.tag_contents ON hash=content_hash WHERE id=$1 AND "
+                "owner_id=$2",
                 aliasrow["tag_id"],
                 ctx.author.id,
             )
@@ -647,8 +1198,9 @@ class Tags(commands.Cog):
                     "A global tag with that name already exists. Try creating "
                     "an alias to your tag and globalizing it under this name")
                 return
-            await self.create_tag(ctx, alias, tag["content"], 0)
-        await ctx.send(f"Global tag {alias} created successfully")
+            created = await self.create_tag(ctx, alias, tag["content"], 0)
+        if created:
+            await ctx.send(f"Global tag {alias} created successfully")
 
     @tag_global.command(name="delete", aliases=["remove"])
     @commands.guild_only()
@@ -694,22 +1246,25 @@ class Tags(commands.Cog):
         alias = name
         location_id = self.bot.get_id(ctx)
         async with self.bot.pool.acquire() as database:
-            tag = await database.fetchrow(
-                "SELECT * FROM public.tags WHERE name=$1 AND location_id=0",
-                name,
-            )
+            tag = self.cache.get(0, name)
             if not tag:
-                rows = await self.search_tag(name, 0, database)
-                if rows:
-                    await ctx.send(
-                        f"Global tag not found. Did you mean\n{rows}")
+                tag = await database.fetchrow(
+                    "SELECT id, content FROM public.tags INNER JOIN "
+                    "public.tag_contents ON hash=content_hash WHERE name=$1 "
+                    "AND location_id=0",
+                    name,
+                )
+                if not tag:
+                    rows = await self.search_tag(name, 0, database)
+                    if rows:
+                        await ctx.send(
+                            f"Global tag not found. Did you mean\n{rows}")
+                        return
+                    await ctx.send(f"No global tag named {name} found")
                     return
-                await ctx.send(f"No global tag named {name} found")
-                return
-            await database.execute(
-                "UPDATE public.tags SET use_count=use_count+1 WHERE id=$1",
-                tag["id"],
-            )
+                self.cache.put(0, name, tag["id"], tag["content"])
+            tag_id, content = tag
+            self.tag_uses[tag_id] += 1
             already_exists = await database.fetchrow(
                 "SELECT * FROM public.tag_lookup WHERE name=$1 AND location_id=$2",
                 name,
@@ -750,12 +1305,6 @@ class Tags(commands.Cog):
                 finally:
                     ctx.message = original
 
-                if not self.check_tag(alias, ctx.guild.id, ctx.author.id):
-                    await ctx.send(
-                        "Someone is already making a tag with that name. Sorry"
-                    )
-                    return
-
                 already_exists = await database.fetchrow(
                     "SELECT * FROM public.tag_lookup WHERE name=$1 AND "
                     "location_id=$2",
@@ -767,8 +1316,18 @@ class Tags(commands.Cog):
                         "A tag with that name already exists. Aborting")
                     return
 
-            await self.create_tag(ctx, alias, tag["content"])
-            await ctx.send(f"Tag {alias} created successfully")
+            if await self.create_tag(ctx, alias, content):
+                await ctx.send(f"Tag {alias} created successfully")
+
+    @tag_global.command(name="grep")
+    @commands.guild_only()
+    async def global_grep(self, ctx: commands.Context, *, words: str) -> None:
+        """Search for the global tags containing some words."""
+        await send_keyset_pages(
+            ctx,
+            self.grep_source(0, words, f"Global tags containing {words}"),
+            "There are no tags to show",
+        )
 
     @tag_global.command(name="search")
     @commands.guild_only()
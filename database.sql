@@ -17,13 +17,21 @@ CREATE TABLE business (
     bank_max integer NOT NULL,
     streak integer NOT NULL,
     last_daily integer NOT NULL,
-    steal_streak integer NOT NULL
+    steal_streak integer NOT NULL,
+    updated_at timestamp with time zone NOT NULL
 );
 
 
+ALTER TABLE public.business ALTER updated_at SET DEFAULT now();
+
 ALTER TABLE business ADD CONSTRAINT business_id_primary
   PRIMARY KEY (id);
 
+CREATE INDEX business_total ON public.business ((money + bank) DESC, id)
+  INCLUDE (money, bank);
+
+CREATE INDEX business_updated ON public.business (updated_at);
+
 ALTER TABLE business OWNER TO chaotic;
 
 CREATE TABLE custom (
@@ -198,14 +206,31 @@ ALTER TABLE tag_lookup ADD CONSTRAINT unique_aliases
   UNIQUE (name, location_id);
 
 CREATE INDEX sim_index ON public.tag_lookup USING gist (name gist_trgm_ops);
+CREATE INDEX tag_lookup_location ON public.tag_lookup (location_id, name);
+CREATE INDEX tag_lookup_owner ON public.tag_lookup (location_id, owner_id, name);
 
 ALTER TABLE tag_lookup OWNER TO chaotic;
 
+CREATE TABLE tag_contents (
+    hash bytea NOT NULL,
+    content text NOT NULL,
+    search tsvector GENERATED ALWAYS AS
+      (to_tsvector('english', content)) STORED
+);
+
+
+ALTER TABLE tag_contents ADD CONSTRAINT tag_contents_primary
+  PRIMARY KEY (hash);
+
+CREATE INDEX tag_contents_search ON public.tag_contents USING gin (search);
+
+ALTER TABLE tag_contents OWNER TO chaotic;
+
 CREATE TABLE tags (
     location_id bigint NOT NULL,
     owner_id bigint NOT NULL,
     name text NOT NULL,
-    content text NOT NULL,
+    content_hash bytea NOT NULL,
     created_at timestamp with time zone NOT NULL,
     id integer NOT NULL,
     use_count integer NOT NULL
@@ -221,6 +246,12 @@ ALTER TABLE tags ADD CONSTRAINT unique_tags
 ALTER TABLE tags ADD CONSTRAINT tag_id_primary
   PRIMARY KEY (id);
 
+ALTER TABLE tags ADD CONSTRAINT tags_content_foreign
+  FOREIGN KEY (content_hash) REFERENCES tag_contents (hash);
+
+CREATE INDEX tags_top ON public.tags (location_id, use_count DESC, id DESC);
+CREATE INDEX tags_content ON public.tags (content_hash);
+
 ALTER TABLE tags OWNER TO chaotic;
 
 CREATE TABLE threads (
@@ -236,3 +267,131 @@ ALTER TABLE threads ADD CONSTRAINT unique_threads
   UNIQUE (channel_id);
 
 ALTER TABLE threads OWNER TO chaotic;
+
+CREATE TABLE role_jobs (
+    message_id bigint NOT NULL,
+    channel_id bigint NOT NULL,
+    guild_id bigint NOT NULL,
+    emoji text NOT NULL,
+    roleids bigint[] NOT NULL,
+    last_user_id bigint NOT NULL,
+    applied integer NOT NULL,
+    status_channel_id bigint,
+    status_message_id bigint
+);
+
+
+ALTER TABLE public.role_jobs ALTER last_user_id SET DEFAULT 0;
+ALTER TABLE public.role_jobs ALTER applied SET DEFAULT 0;
+
+ALTER TABLE role_jobs ADD CONSTRAINT role_jobs_primary
+  PRIMARY KEY (message_id, emoji);
+
+ALTER TABLE role_jobs OWNER TO chaotic;
+
+CREATE TABLE role_reactors (
+    message_id bigint NOT NULL,
+    emoji text NOT NULL,
+    guild_id bigint NOT NULL,
+    user_id bigint NOT NULL
+);
+
+
+ALTER TABLE role_reactors ADD CONSTRAINT role_reactors_primary
+  PRIMARY KEY (message_id, emoji, user_id);
+
+CREATE INDEX role_reactors_member ON public.role_reactors (guild_id, user_id);
+
+ALTER TABLE role_reactors OWNER TO chaotic;
+
+CREATE TABLE cooldowns (
+    command text NOT NULL,
+    bucket text NOT NULL,
+    expires_at timestamp with time zone NOT NULL
+);
+
+
+ALTER TABLE cooldowns ADD CONSTRAINT cooldowns_primary
+  PRIMARY KEY (command, bucket);
+
+ALTER TABLE cooldowns OWNER TO chaotic;
+
+CREATE TABLE business_members (
+    guild_id bigint NOT NULL,
+    user_id bigint NOT NULL
+);
+
+
+ALTER TABLE business_members ADD CONSTRAINT business_members_primary
+  PRIMARY KEY (guild_id, user_id);
+
+ALTER TABLE business_members OWNER TO chaotic;
+
+CREATE TABLE leaderboards (
+    guild_id bigint NOT NULL,
+    rank bigint NOT NULL,
+    user_id bigint NOT NULL,
+    total integer NOT NULL
+);
+
+
+ALTER TABLE leaderboards ADD CONSTRAINT leaderboards_primary
+  PRIMARY KEY (guild_id, rank);
+
+CREATE INDEX leaderboards_member ON public.leaderboards (guild_id, user_id);
+
+ALTER TABLE leaderboards OWNER TO chaotic;
+
+CREATE SEQUENCE ledger_id_seq;
+
+CREATE TABLE ledger (
+    id bigint NOT NULL,
+    user_id bigint NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    reason text NOT NULL,
+    money_change integer NOT NULL,
+    bank_change integer NOT NULL,
+    money integer NOT NULL,
+    bank integer NOT NULL
+);
+
+
+ALTER TABLE public.ledger ALTER id SET DEFAULT nextval('ledger_id_seq'::regclass);
+ALTER TABLE public.ledger ALTER created_at SET DEFAULT now();
+
+ALTER TABLE ledger ADD CONSTRAINT ledger_id_primary
+  PRIMARY KEY (id);
+
+CREATE INDEX ledger_user ON public.ledger (user_id, id DESC);
+
+CREATE INDEX ledger_user_created ON public.ledger
+  (user_id, created_at DESC, id DESC);
+
+ALTER TABLE ledger OWNER TO chaotic;
+
+CREATE TABLE interest_runs (
+    started_at timestamp with time zone NOT NULL,
+    last_id bigint NOT NULL,
+    accounts integer NOT NULL,
+    duration real NOT NULL,
+    finished_at timestamp with time zone
+);
+
+
+ALTER TABLE public.interest_runs ALTER last_id SET DEFAULT -1;
+ALTER TABLE public.interest_runs ALTER accounts SET DEFAULT 0;
+ALTER TABLE public.interest_runs ALTER duration SET DEFAULT 0;
+
+ALTER TABLE interest_runs ADD CONSTRAINT interest_runs_primary
+  PRIMARY KEY (started_at);
+
+ALTER TABLE interest_runs OWNER TO chaotic;
+
+CREATE TABLE ledger_reconciliation (
+    reconciled_at timestamp with time zone NOT NULL
+);
+
+
+INSERT INTO public.ledger_reconciliation VALUES ('-infinity');
+
+ALTER TABLE ledger_reconciliation OWNER TO chaotic;
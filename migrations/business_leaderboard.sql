@@ -0,0 +1,35 @@
+-- Adds the tables and the index used by the economy leaderboards and ranks.
+-- Requires PostgreSQL 11 or later.
+
+BEGIN;
+
+CREATE INDEX business_total ON public.business ((money + bank) DESC, id)
+  INCLUDE (money, bank);
+
+CREATE TABLE business_members (
+    guild_id bigint NOT NULL,
+    user_id bigint NOT NULL
+);
+
+
+ALTER TABLE business_members ADD CONSTRAINT business_members_primary
+  PRIMARY KEY (guild_id, user_id);
+
+ALTER TABLE business_members OWNER TO chaotic;
+
+CREATE TABLE leaderboards (
+    guild_id bigint NOT NULL,
+    rank bigint NOT NULL,
+    user_id bigint NOT NULL,
+    total integer NOT NULL
+);
+
+
+ALTER TABLE leaderboards ADD CONSTRAINT leaderboards_primary
+  PRIMARY KEY (guild_id, rank);
+
+CREATE INDEX leaderboards_member ON public.leaderboards (guild_id, user_id);
+
+ALTER TABLE leaderboards OWNER TO chaotic;
+
+COMMIT;
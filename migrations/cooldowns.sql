@@ -0,0 +1,17 @@
+-- Adds the table storing the cooldowns of daily and gift.
+
+BEGIN;
+
+CREATE TABLE cooldowns (
+    command text NOT NULL,
+    bucket text NOT NULL,
+    expires_at timestamp with time zone NOT NULL
+);
+
+
+ALTER TABLE cooldowns ADD CONSTRAINT cooldowns_primary
+  PRIMARY KEY (command, bucket);
+
+ALTER TABLE cooldowns OWNER TO chaotic;
+
+COMMIT;
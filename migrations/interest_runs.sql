@@ -0,0 +1,23 @@
+-- Adds the table tracking the daily bank interest runs.
+
+BEGIN;
+
+CREATE TABLE interest_runs (
+    started_at timestamp with time zone NOT NULL,
+    last_id bigint NOT NULL,
+    accounts integer NOT NULL,
+    duration real NOT NULL,
+    finished_at timestamp with time zone
+);
+
+
+ALTER TABLE public.interest_runs ALTER last_id SET DEFAULT -1;
+ALTER TABLE public.interest_runs ALTER accounts SET DEFAULT 0;
+ALTER TABLE public.interest_runs ALTER duration SET DEFAULT 0;
+
+ALTER TABLE interest_runs ADD CONSTRAINT interest_runs_primary
+  PRIMARY KEY (started_at);
+
+ALTER TABLE interest_runs OWNER TO chaotic;
+
+COMMIT;
@@ -0,0 +1,29 @@
+-- Adds the append-only ledger of the GP movements.
+
+BEGIN;
+
+CREATE SEQUENCE ledger_id_seq;
+
+CREATE TABLE ledger (
+    id bigint NOT NULL,
+    user_id bigint NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    reason text NOT NULL,
+    money_change integer NOT NULL,
+    bank_change integer NOT NULL,
+    money integer NOT NULL,
+    bank integer NOT NULL
+);
+
+
+ALTER TABLE public.ledger ALTER id SET DEFAULT nextval('ledger_id_seq'::regclass);
+ALTER TABLE public.ledger ALTER created_at SET DEFAULT now();
+
+ALTER TABLE ledger ADD CONSTRAINT ledger_id_primary
+  PRIMARY KEY (id);
+
+CREATE INDEX ledger_user ON public.ledger (user_id, id DESC);
+
+ALTER TABLE ledger OWNER TO chaotic;
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- Tracks when each balance last changed, and where the ledger
+-- reconciliation stopped.
+
+BEGIN;
+
+ALTER TABLE public.business ADD COLUMN updated_at timestamp with time zone
+  NOT NULL DEFAULT now();
+
+CREATE INDEX business_updated ON public.business (updated_at);
+
+CREATE INDEX ledger_user_created ON public.ledger
+  (user_id, created_at DESC, id DESC);
+
+CREATE TABLE ledger_reconciliation (
+    reconciled_at timestamp with time zone NOT NULL
+);
+
+
+INSERT INTO public.ledger_reconciliation VALUES ('-infinity');
+
+ALTER TABLE ledger_reconciliation OWNER TO chaotic;
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- Adds the table used by the resumable role jobs.
+-- Only needed for databases created before this table was added to
+-- database.sql.
+
+BEGIN;
+
+CREATE TABLE role_jobs (
+    message_id bigint NOT NULL,
+    channel_id bigint NOT NULL,
+    guild_id bigint NOT NULL,
+    emoji text NOT NULL,
+    roleids bigint[] NOT NULL,
+    last_user_id bigint NOT NULL,
+    applied integer NOT NULL,
+    status_channel_id bigint,
+    status_message_id bigint
+);
+
+
+ALTER TABLE public.role_jobs ALTER last_user_id SET DEFAULT 0;
+ALTER TABLE public.role_jobs ALTER applied SET DEFAULT 0;
+
+ALTER TABLE role_jobs ADD CONSTRAINT role_jobs_primary
+  PRIMARY KEY (message_id, emoji);
+
+ALTER TABLE role_jobs OWNER TO chaotic;
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- Adds the index of the members that reacted to role messages.
+-- Only needed for databases created before this table was added to
+-- database.sql.
+
+BEGIN;
+
+CREATE TABLE role_reactors (
+    message_id bigint NOT NULL,
+    emoji text NOT NULL,
+    guild_id bigint NOT NULL,
+    user_id bigint NOT NULL
+);
+
+
+ALTER TABLE role_reactors ADD CONSTRAINT role_reactors_primary
+  PRIMARY KEY (message_id, emoji, user_id);
+
+CREATE INDEX role_reactors_member ON public.role_reactors (guild_id, user_id);
+
+ALTER TABLE role_reactors OWNER TO chaotic;
+
+COMMIT;
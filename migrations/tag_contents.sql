@@ -0,0 +1,44 @@
+-- Moves tag contents to the content-addressed tag_contents table.
+-- Only needed for databases created before this table was added to
+-- database.sql. The last statement reports the bytes saved.
+
+BEGIN;
+
+CREATE TEMPORARY TABLE content_size ON COMMIT DROP AS
+  SELECT COALESCE(SUM(octet_length(content)), 0) AS before
+  FROM public.tags;
+
+CREATE TABLE tag_contents (
+    hash bytea NOT NULL,
+    content text NOT NULL
+);
+
+
+ALTER TABLE tag_contents ADD CONSTRAINT tag_contents_primary
+  PRIMARY KEY (hash);
+
+ALTER TABLE tag_contents OWNER TO chaotic;
+
+INSERT INTO tag_contents
+  SELECT DISTINCT sha256(convert_to(content, 'UTF8')), content
+  FROM public.tags;
+
+ALTER TABLE tags ADD COLUMN content_hash bytea;
+UPDATE tags SET content_hash = sha256(convert_to(content, 'UTF8'));
+ALTER TABLE tags ALTER content_hash SET NOT NULL;
+ALTER TABLE tags DROP COLUMN content;
+
+ALTER TABLE tags ADD CONSTRAINT tags_content_foreign
+  FOREIGN KEY (content_hash) REFERENCES tag_contents (hash);
+
+CREATE INDEX tags_content ON public.tags (content_hash);
+
+SELECT
+  before AS bytes_before,
+  after AS bytes_after,
+  before - after AS bytes_saved
+FROM content_size,
+  (SELECT COALESCE(SUM(octet_length(content)), 0) AS after
+   FROM tag_contents) AS sizes;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Adds the indexes supporting the keyset pagination of the tag lists.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS tag_lookup_location
+  ON public.tag_lookup (location_id, name);
+CREATE INDEX IF NOT EXISTS tag_lookup_owner
+  ON public.tag_lookup (location_id, owner_id, name);
+CREATE INDEX IF NOT EXISTS tags_top
+  ON public.tags (location_id, use_count DESC, id DESC);
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Adds the full-text search column used by `tag grep`.
+-- Requires PostgreSQL 12 or later, and migrations/tag_contents.sql.
+
+ALTER TABLE tag_contents ADD COLUMN search tsvector GENERATED ALWAYS AS
+  (to_tsvector('english', content)) STORED;
+
+CREATE INDEX tag_contents_search ON public.tag_contents USING gin (search);